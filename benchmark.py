@@ -0,0 +1,257 @@
+"""Benchmark annotate_image() and wrap_text() at real photo sizes.
+
+Builds synthetic JPEGs at phone and DSLR resolutions, times each stage of the
+annotation path (open, EXIF, decode, wrap, draw, encode/save) for short and long
+annotation texts, measures photos per second for the single-image and batch
+paths, and writes everything to a JSON file so runs can be compared over time:
+
+    python benchmark.py --output bench_before.json
+    python benchmark.py --output bench_after.json --baseline bench_before.json
+
+The annotation font (arialbd.ttf) must be loadable, or pass --font.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+import io
+import shutil
+
+import photo_annotator as pa
+from PIL import Image, ImageDraw, ImageChops
+
+RESOLUTIONS = {
+    "12MP": (4000, 3000),  # typical phone
+    "24MP": (6000, 4000),  # typical DSLR
+    "48MP": (8000, 6000),  # high resolution phone
+}
+TEXTS = {
+    "short": ("IMG_0001.jpg\nKitchen\nGeneral Condition",
+              "Jane Smith\nMunicon West Coast\n2024:05:01 10:00:00"),
+    "long": ("123_Main_Street_Unit_4_12.jpg\nNorth east corner of the second floor mechanical room, behind the boiler\n"
+             "Hairline cracking along the mortar joints of the block wall, approx. 1.5 m long, with efflorescence "
+             "and minor spalling at the base; recommend monitoring and repointing before the next wet season",
+             "Jane Smith\nMunicon West Coast\n2024:05:01 10:00:00"),
+}
+STAGES = ("open", "exif", "decode", "wrap", "draw", "save")
+
+def make_photo(path, size):
+    """Write a synthetic JPEG with photo-like content (gradients plus sensor noise) and an EXIF date."""
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 24)
+    red = ImageChops.add(gradient, noise, scale=1.2)
+    green = ImageChops.add(gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), noise, scale=1.5)
+    blue = Image.radial_gradient("L").resize(size)
+    exif = Image.Exif()
+    exif.get_ifd(pa.EXIF_IFD)[pa.EXIF_DATETIME_ORIGINAL] = "2024:05:01 10:00:00"
+    exif[pa.EXIF_ARTIST] = "Jane Smith"
+    Image.merge("RGB", (red, green, blue)).save(path, quality=92, exif=exif.tobytes())
+
+def summarize(samples):
+    return {
+        "mean": statistics.mean(samples),
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+def time_stages(image_path, left_text, right_text, output_path, warm_cache, profile):
+    """Run the annotate_image() path once, timing each stage. Returns {stage: seconds}."""
+    if not warm_cache:
+        pa.clear_caches()
+    timings = {}
+
+    start = time.perf_counter()
+    photo = pa.PhotoRecord(image_path)
+    timings["open"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pa.read_exif_fields(image_path)
+    timings["exif"] = time.perf_counter() - start
+
+    with photo:
+        start = time.perf_counter()
+        img = photo.pixels(profile.get("max_dimension"))
+        timings["decode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text_layout = pa.layout_text(img.size, left_text, right_text)
+        timings["wrap"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pa.draw_text(img, text_layout)
+        timings["draw"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        img.save(output_path, **pa.save_options(profile, photo))
+        timings["save"] = time.perf_counter() - start
+    return timings
+
+def bench_single(image_path, texts, output_path, repeat, warm_cache, profile):
+    samples = {stage: [] for stage in STAGES}
+    totals = []
+    for _ in range(repeat):
+        timings = time_stages(image_path, *texts, output_path, warm_cache, profile)
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+        totals.append(sum(timings.values()))
+
+    # end to end through the public entry point
+    end_to_end = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pa.annotate_image(image_path, *texts, output_path, profile)
+        end_to_end.append(time.perf_counter() - start)
+
+    return {
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+        "total": summarize(totals),
+        "annotate_image": summarize(end_to_end),
+        "photos_per_second": 1 / statistics.median(end_to_end),
+    }
+
+def bench_wrap(repeat):
+    """Time wrap_text() alone, cold (empty caches) and warm, for every text at every resolution's font size."""
+    results = {}
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    for resolution, (width, height) in RESOLUTIONS.items():
+        font_size = int(min(width, height) // 40)
+        max_width = width // 2 - font_size
+        for name, (left_text, right_text) in TEXTS.items():
+            cold, warm = [], []
+            for _ in range(repeat):
+                pa.clear_caches()
+                font = pa.load_font(font_size)
+                start = time.perf_counter()
+                pa.wrap_text(left_text, font, max_width, draw)
+                cold.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                pa.wrap_text(left_text, font, max_width, draw)
+                warm.append(time.perf_counter() - start)
+            results[f"{resolution}/{name}"] = {"cold": summarize(cold), "warm": summarize(warm)}
+    return results
+
+def use_font(font_file):
+    """Worker process initializer: render with the same font as the benchmark process (see --font)."""
+    pa.FONT_FILE = font_file
+
+def bench_batch(workdir, resolution, photos, workers, profile):
+    """Photos per second through annotate_batch() for a CSV of `photos` copies of one photo."""
+    images_dir = os.path.join(workdir, f"batch_{resolution}")
+    prints_dir = os.path.join(workdir, f"batch_{resolution}_prints")
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(prints_dir, exist_ok=True)
+    source = os.path.join(workdir, f"{resolution}.jpg")
+    records = []
+    for index in range(photos):
+        filename = f"photo_{index:04d}.jpg"
+        path = os.path.join(images_dir, filename)
+        if not os.path.exists(path):
+            shutil.copyfile(source, path)
+        records.append(pa.CsvRecord(filename, "Kitchen", None, "General Condition", None, "Jane Smith"))
+
+    # spawned workers (Windows, macOS) import photo_annotator afresh, so they are told the font too
+    pool = pa.WorkerPool(workers, initializer=use_font, initargs=(pa.FONT_FILE,)) if workers > 1 else None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = pa.annotate_batch(images_dir, prints_dir, records, workers=workers, profile=profile, executor=pool)
+        elapsed = time.perf_counter() - start
+    finally:
+        if pool:
+            pool.shutdown()
+    return {"photos": photos, "workers": workers, "seconds": elapsed,
+            "photos_per_second": photos / elapsed, "failures": len(failures)}
+
+def compare(results, baseline_path):
+    """Print the median time of every single-image stage against a previous results file."""
+    with open(baseline_path, "r") as file:
+        baseline = json.load(file)
+    print(f"\nCompared with {baseline_path} (median seconds, ratio < 1 is faster):")
+    for key, result in results["single"].items():
+        previous = baseline.get("single", {}).get(key)
+        if not previous:
+            continue
+        for stage in STAGES + ("total",):
+            now = result["total"] if stage == "total" else result["stages"][stage]
+            before = previous["total"] if stage == "total" else previous["stages"].get(stage)
+            if before and before["median"] > 0:
+                print(f"  {key:12} {stage:7} {before['median']:.4f} -> {now['median']:.4f}  x{now['median'] / before['median']:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark annotate_image() and wrap_text() at real photo sizes.")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file (default: %(default)s)")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS), help="comma separated subset of " + ", ".join(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default: %(default)s)")
+    parser.add_argument("--warm-cache", action="store_true", help="keep font/wrap caches between runs, as in a real batch")
+    parser.add_argument("--batch-photos", type=int, default=16, help="photos per batch run, 0 to skip (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=pa.BATCH_WORKERS, help="batch worker processes (default: %(default)s)")
+    parser.add_argument("--profile", choices=pa.OUTPUT_PROFILES, default=pa.DEFAULT_OUTPUT_PROFILE,
+                        help="output profile to render with (default: %(default)s)")
+    parser.add_argument("--font", help="font file to use instead of " + pa.FONT_FILE)
+    parser.add_argument("--workdir", help="keep the synthetic photos here instead of a temporary directory")
+    args = parser.parse_args(argv)
+
+    if args.font:
+        pa.FONT_FILE = args.font
+    profile = pa.OUTPUT_PROFILES[args.profile]
+    resolutions = [name.strip() for name in args.resolutions.split(",") if name.strip()]
+    unknown = [name for name in resolutions if name not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"unknown resolution(s): {', '.join(unknown)}")
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"repeat": args.repeat, "warm_cache": args.warm_cache, "resolutions": resolutions,
+                   "batch_photos": args.batch_photos, "workers": args.workers, "profile": args.profile},
+        "single": {},
+        "wrap": {},
+        "batch": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="annotator_bench_"))
+        os.makedirs(workdir, exist_ok=True)
+        for resolution in resolutions:
+            image_path = os.path.join(workdir, f"{resolution}.jpg")
+            if not os.path.exists(image_path):
+                print(f"Generating {resolution} test photo...")
+                make_photo(image_path, RESOLUTIONS[resolution])
+            for name, texts in TEXTS.items():
+                key = f"{resolution}/{name}"
+                output_path = os.path.join(workdir, "out" + pa.output_extension(profile, ".jpg"))
+                result = bench_single(image_path, texts, output_path, args.repeat, args.warm_cache, profile)
+                results["single"][key] = result
+                print(f"{key:12} {result['photos_per_second']:6.2f} photos/s  " +
+                      "  ".join(f"{stage} {result['stages'][stage]['median'] * 1000:7.1f}ms" for stage in STAGES))
+
+        results["wrap"] = bench_wrap(args.repeat)
+        for key, result in results["wrap"].items():
+            print(f"wrap {key:12} cold {result['cold']['median'] * 1e6:8.1f}us  warm {result['warm']['median'] * 1e6:8.1f}us")
+
+        if args.batch_photos > 0:
+            for resolution in resolutions:
+                result = bench_batch(workdir, resolution, args.batch_photos, args.workers, profile)
+                results["batch"][resolution] = result
+                print(f"batch {resolution:6} {result['photos_per_second']:6.2f} photos/s ({result['workers']} workers)")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,60 @@
 import os
 import json
 import sys
-import tkinter as tk
 import subprocess
-from tkinter import filedialog, simpledialog, messagebox, Button
 import time
+import math
+import argparse
+import csv
+import collections
+import hashlib
+import struct
+import io
+import contextlib
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 CONFIG_FILE = "photo_annotator_config.json"
-
-
-def install_dependencies():
-    libraries = ["Pillow", "pandas"]
+EXIF_IFD = 0x8769  # pointer to the Exif sub-IFD
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_ORIENTATION = 274
+EXIF_ARTIST = 315
+EXIF_SCAN_WORKERS = 8  # threads used to read EXIF headers in bulk (I/O bound, mostly network latency)
+BATCH_WORKERS = os.cpu_count() or 1  # number of processes used to annotate CSV batches
+OVERWRITE_POLICIES = ("always", "skip", "changed")
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+PREFETCH_COUNT = 3  # number of upcoming previews decoded in the background in manual mode
+THUMBNAIL_SIZE = 160  # long edge of contact sheet thumbnails, in pixels
+THUMBNAIL_CACHE_DIR = ".photo_annotator_thumbs"  # kept in the image directory, see load_thumbnail()
+THUMBNAIL_WORKERS = os.cpu_count() or 4  # threads decoding thumbnails (Pillow releases the GIL while decoding)
+# Output profiles for annotated prints. max_dimension caps the long edge (None keeps the
+# source size); format, quality, progressive and optimize go to the encoder (None keeps
+# Pillow's defaults, and the source format); exif copies the source EXIF block to the print.
+OUTPUT_PROFILES = {
+    "original": {"format": None, "max_dimension": None, "quality": None, "progressive": False, "optimize": False, "exif": False},
+    "print": {"format": "JPEG", "max_dimension": 2400, "quality": 85, "progressive": False, "optimize": True, "exif": True},
+    "webp": {"format": "WEBP", "max_dimension": 2400, "quality": 80, "progressive": False, "optimize": False, "exif": True},
+}
+DEFAULT_OUTPUT_PROFILE = "original"
+OUTPUT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+REPORT_FILE = "photo_annotator_report.json"  # written next to the Prints directory at the end of each run
+REPORT_SLOWEST_FILES = 10
+STATUS_REFRESH_MS = 250  # how often the annotation window's render status line is updated
+WATCH_POLL_INTERVAL = 2.0  # seconds between checks of the watched folder and CSV
+WATCH_SETTLE_TIME = 3.0  # a new photo must keep the same size and mtime this long before it is annotated
+WATCH_RESCAN_INTERVAL = 600.0  # seconds between full rescans, to catch photos overwritten in place
+INDEX_FILE = ".photo_annotator_index.json"  # kept in the image directory, see ImageIndex
+IMAGE_ORDERS = ("capture", "name")
+DEFAULT_IMAGE_ORDER = "capture"
+SESSION_FILE = ".photo_annotator_session.jsonl"  # kept in the image directory, see SessionJournal
+MANIFEST_FILE = ".photo_annotator_manifest.json"  # kept in the Prints directory, see RenderManifest
+MANIFEST_LOG_FILE = ".photo_annotator_manifest.log"  # renders since the manifest was last saved, see RenderManifest
+MANIFEST_SAVE_INTERVAL = 200  # fold the manifest log into the manifest once it has more lines than this (and entries)
+
+
+def install_dependencies(libraries=("Pillow",)):
     for lib in libraries:
         try:
             subprocess.check_call([sys.executable, "-m", "pip", "install", lib])
@@ -18,13 +63,12 @@ def install_dependencies():
 
 def attempt_imports():
     try:
-        global pd, Image, ImageDraw, ImageFont, ImageTk
-        import pandas as pd
-        from PIL import Image, ImageDraw, ImageFont, ImageTk
+        global Image, ImageDraw, ImageFont
+        from PIL import Image, ImageDraw, ImageFont
         return True
     except ImportError as e:
         print("Missing required libraries. Installing...")
-        install_dependencies()
+        install_dependencies(["Pillow"])
         return False
     
 # Attempt to import the libraries. If imports fail, install the dependencies and try one more time.
@@ -34,127 +78,1747 @@ if not attempt_imports():
         print("Failed to import libraries after installation attempts.")
         sys.exit(1)
 
+# Pillow refuses photos over ~179 MP as possible decompression bombs, but drone mosaics and panoramas
+# that large are what this tool is given; --memory-budget is what keeps their decoding in check.
+Image.MAX_IMAGE_PIXELS = None
+
+def import_tkinter():
+    """Import tkinter and Pillow's Tk bridge on demand; only the interactive mode needs a display."""
+    global tk, filedialog, simpledialog, messagebox, ImageTk
+    import tkinter as tk
+    from tkinter import filedialog, simpledialog, messagebox
+    from PIL import ImageTk
+
 def select_image_directory():
-    root = tk.Tk()
-    root.withdraw()  # Hide the main window
+    get_root()
     dir_path = filedialog.askdirectory(title='SELECT IMAGE DIRECTORY...')
     return dir_path
 
 # select csv file function:
 def select_csv_file():
-    root = tk.Tk()
-    root.withdraw()  # Hide the main window
+    get_root()
     csv_path = filedialog.askopenfilename(title='SELECT PHOTODATA.CSV...')
     # if not a CSV, return None
     if not csv_path.endswith('.csv'):
         return None
     return csv_path
 
-def wrap_text(text, font, max_width, draw):
-    """Wrap text to fit within a given width when rendered."""
-    # print("MAX WIDTH: ", max_width)
-    # print("TEXT: ", text)
+# Hot-path instrumentation. timed() adds the time spent in a block to a stage of the photo
+# currently being processed in this process; take_stage_times() hands those over (from a
+# batch worker back to the parent with each result) and starts the next photo.
+_stage_times = {}
+
+@contextlib.contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_times[stage] = _stage_times.get(stage, 0.0) + time.perf_counter() - start
+
+def take_stage_times():
+    """Return the stage times recorded since the last call and start a new set."""
+    global _stage_times
+    stage_times, _stage_times = _stage_times, {}
+    return stage_times
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class RunReport:
+    """Per-stage timings, counters and per-file totals for one run, summarized as JSON."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = time.time()
+        self.start_time = time.perf_counter()
+        self.stages = collections.defaultdict(list)  # stage -> seconds, one sample per photo
+        self.counters = collections.Counter()
+        self.files = []  # (total seconds, filename, stage times)
+
+    def add_file(self, filename, stage_times, counters=None):
+        for stage, seconds in stage_times.items():
+            self.stages[stage].append(seconds)
+        if stage_times:
+            self.files.append((sum(stage_times.values()), filename, stage_times))
+        if counters:
+            self.counters.update(counters)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start_time
+        stages = {}
+        for stage, samples in self.stages.items():
+            ordered = sorted(samples)
+            stages[stage] = {"count": len(ordered), "total": sum(ordered), "p50": _percentile(ordered, 50),
+                             "p95": _percentile(ordered, 95), "max": ordered[-1]}
+        slowest = sorted(self.files, key=lambda file: file[0], reverse=True)[:REPORT_SLOWEST_FILES]
+        return {
+            "mode": self.mode,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "elapsed": elapsed,
+            "photos_per_second": self.counters["annotated"] / elapsed if elapsed > 0 else 0.0,
+            "counters": dict(self.counters),
+            "stages": stages,
+            "slowest_files": [{"file": filename, "total": total, "stages": stage_times}
+                              for total, filename, stage_times in slowest],
+        }
+
+    def write(self, prints_dir):
+        """Write the summary next to the Prints directory, print the stage table, and return the report path."""
+        summary = self.summary()
+        report_path = os.path.join(os.path.dirname(os.path.abspath(prints_dir)), REPORT_FILE)
+        with open(report_path, "w") as file:
+            json.dump(summary, file, indent=2)
+        if summary["stages"]:
+            print("\nStage        total      p50      p95")
+            for stage, numbers in sorted(summary["stages"].items(), key=lambda item: -item[1]["total"]):
+                print(f"{stage:10} {numbers['total']:7.1f}s {numbers['p50'] * 1000:6.0f}ms {numbers['p95'] * 1000:6.0f}ms")
+        print(f"Run report written to {report_path}")
+        return report_path
+
+# Fonts and text measurements are cached per process: most photos share a handful of
+# resolutions (so font sizes) and most annotation lines repeat from photo to photo.
+FONT_FILE = "arialbd.ttf"
+FONT_CACHE_SIZE = 16
+TEXT_WIDTH_CACHE_SIZE = 50000
+WRAP_CACHE_SIZE = 4096
+BAND_CACHE_SIZE = 64  # a rendered block holds one mask per line, ~100 KB at 24 MP
+MAX_KERNING = 0.25  # bound on the kerning of one letter pair, in ems (real fonts stay well under it)
+_font_cache = collections.OrderedDict()        # font size -> FreeTypeFont
+_text_width_cache = collections.OrderedDict()  # (font key, text) -> rendered width in pixels
+_wrap_cache = collections.OrderedDict()        # (text, font key, max width) -> wrapped lines
+_band_cache = collections.OrderedDict()        # (align, lines, font key, fontmode) -> TextStamps
+_cache_counters = collections.Counter()
+
+def _lru_lookup(cache, name, key, limit, compute):
+    """Return cache[key], computing and storing it on a miss and evicting the least recently used entry."""
+    try:
+        value = cache[key]
+    except KeyError:
+        _cache_counters[name + "_misses"] += 1
+        value = cache[key] = compute()
+        if len(cache) > limit:
+            cache.popitem(last=False)
+        return value
+    _cache_counters[name + "_hits"] += 1
+    cache.move_to_end(key)
+    return value
+
+def cache_stats():
+    """Hit/miss counters and current sizes of the font and text layout caches (for this process)."""
+    stats = {counter: _cache_counters[counter] for counter in (
+        "font_hits", "font_misses", "text_width_hits", "text_width_misses", "wrap_hits", "wrap_misses",
+        "band_hits", "band_misses")}
+    stats.update(font_entries=len(_font_cache), text_width_entries=len(_text_width_cache), wrap_entries=len(_wrap_cache),
+                 band_entries=len(_band_cache))
+    return stats
+
+def clear_caches():
+    """Empty the font and text layout caches and reset their counters (used by benchmark.py)."""
+    for cache in (_font_cache, _text_width_cache, _wrap_cache, _band_cache):
+        cache.clear()
+    _cache_counters.clear()
+
+def load_font(size):
+    """Load the annotation font at the given size, reusing previously loaded sizes."""
+    return _lru_lookup(_font_cache, "font", size, FONT_CACHE_SIZE,
+                       lambda: ImageFont.truetype(FONT_FILE, size=size))
+
+def _font_key(font):
+    return (getattr(font, "path", None), getattr(font, "size", None)) if hasattr(font, "path") else id(font)
+
+def text_width(text, font):
+    """Rendered width of text in pixels, memoized per font."""
+    return _lru_lookup(_text_width_cache, "text_width", (_font_key(font), text), TEXT_WIDTH_CACHE_SIZE,
+                       lambda: font.getlength(text))
+
+def wrap_text(text, font, max_width, draw=None):
+    """Wrap text to fit within a given width when rendered.
+
+    Results are cached by (text, font, max_width). Word widths come from the
+    memoized width table, so a line costs one measurement per new word instead of
+    re-measuring every growing prefix. `draw` is accepted for backwards compatibility.
+    """
+    key = (text, _font_key(font), max_width)
+    return list(_lru_lookup(_wrap_cache, "wrap", key, WRAP_CACHE_SIZE,
+                            lambda: tuple(_wrap_lines(text, font, max_width))))
+
+def _wrap_lines(text, font, max_width):
     lines = []
+    space_width = text_width(" ", font)
+    # summed word widths miss the kerning around the joining spaces, at most this much per join;
+    # a line whose estimate is within that of max_width is measured, so the breaks are exact
+    kerning = getattr(font, "size", 0) * MAX_KERNING
     for line in text.split('\n'):
-        # print("\nLINE: ", line)
-        # print("LENGTH: ", draw.textlength(line, font=font))
-
-        if draw.textlength(line, font=font) <= max_width:
+        if text_width(line, font) <= max_width:
             lines.append(line)
-        else:
-            # if too long, split into words
-            words = line.split()
-            i = 0
-            current_line = ''
-            while i < len(words):
-                # Check if adding another word exceeds the max width
-                test_line = current_line + ' ' + words[i] if current_line else words[i] # if current_line is empty, then just add the word first
-
-                if draw.textlength(test_line, font=font) <= max_width:
-                    current_line = test_line
-                    i += 1
+            continue
+
+        # if too long, split into words and fill each line greedily
+        current_words = []
+        current_width = 0
+        estimated_joins = 0  # joins added to current_width since it was last measured
+        for word in line.split():
+            word_width = text_width(word, font)
+            # if current_line is empty, then just add the word first
+            if current_words:
+                test_width = current_width + space_width + word_width
+                margin = 2 * kerning * (estimated_joins + 1)
+                if max_width - margin < test_width <= max_width + margin:
+                    test_width = text_width(' '.join(current_words) + ' ' + word, font)
+                    estimated_joins = 0
                 else:
-                    # if adding the next word exceeds the max width, add the current line and reset. HOWEVER this will not work if the word is longer than the max width. So, we need to check if the word is longer than the max width
-                        
-                    if current_line:  # Ensure there's something to add before resetting
-                        lines.append(current_line)
-
-                    # we know the word hasn't been added to the current line: so we need to check if the word itself is longer than the max width
-                    if draw.textlength(words[i], font=font) > max_width:
-                        lines.append(words[i])
-                        i += 1
-
-                    current_line = ''
-                    
-            if current_line:  # Add any remaining text (here, length is guaranteed to be less than max_width)
-                lines.append(current_line)
+                    estimated_joins += 1
+            else:
+                test_width = word_width
+            if test_width <= max_width:
+                current_words.append(word)
+                current_width = test_width
+                continue
+
+            if current_words:  # Ensure there's something to add before resetting
+                lines.append(' '.join(current_words))
+
+            # a word longer than the max width goes on a line of its own
+            estimated_joins = 0
+            if word_width > max_width:
+                lines.append(word)
+                current_words = []
+                current_width = 0
+            else:
+                current_words = [word]
+                current_width = word_width
+
+        if current_words:  # Add any remaining text (here, length is guaranteed to be less than max_width)
+            lines.append(' '.join(current_words))
     return lines
 
-def annotate_image(image_path, left_text, right_text, output_path):
-    with Image.open(image_path) as img:
-        draw = ImageDraw.Draw(img)
-        width, height = img.size
-        font_size = int(min(width, height) // 40)
-        margin = font_size
-        font = ImageFont.truetype("arialbd.ttf", size=font_size)
+# The fields annotation needs from a photo's EXIF block; any of them may be None.
+ExifFields = collections.namedtuple("ExifFields", "date orientation artist")
+NO_EXIF = ExifFields(None, None, None)
+
+def read_exif_fields(image_path):
+    """Read DateTimeOriginal, Orientation and Artist without decoding the image.
+
+    For JPEGs only the marker segments before the APP1/EXIF block are read (a few
+    KB at most); other formats fall back to Pillow's header parsing. Returns
+    NO_EXIF when the photo has no EXIF block, or raises OSError if it can't be read.
+    """
+    with open(image_path, "rb") as file:
+        if file.read(2) != b"\xff\xd8":  # not a JPEG
+            with Image.open(file) as image:
+                exif = image.getexif()
+                return ExifFields(exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL), exif.get(EXIF_ORIENTATION), exif.get(EXIF_ARTIST))
+
+        while True:
+            marker = file.read(4)
+            if len(marker) < 4 or marker[0] != 0xFF:
+                return NO_EXIF
+            if marker[1] == 0xFF:  # fill byte before the marker
+                file.seek(-3, os.SEEK_CUR)
+                continue
+            if marker[1] in (0xDA, 0xD9):  # start of scan / end of image: no EXIF block
+                return NO_EXIF
+            length = struct.unpack(">H", marker[2:])[0]
+            if marker[1] == 0xE1:
+                segment = file.read(length - 2)
+                if segment.startswith(b"Exif\x00\x00"):
+                    return _parse_exif_tiff(segment[6:])
+            else:
+                file.seek(length - 2, os.SEEK_CUR)
+
+def _parse_exif_tiff(tiff):
+    """Pull the ExifFields out of the TIFF structure inside an APP1 segment."""
+    if tiff[:2] == b"II":
+        order = "<"
+    elif tiff[:2] == b"MM":
+        order = ">"
+    else:
+        return NO_EXIF
+
+    def read_ifd(offset):
+        entries = {}
+        count = struct.unpack_from(order + "H", tiff, offset)[0]
+        for entry in range(count):
+            tag, kind, size = struct.unpack_from(order + "HHI", tiff, offset + 2 + entry * 12)
+            entries[tag] = (kind, size, offset + 2 + entry * 12 + 8)  # value field position
+        return entries
+
+    def ascii_value(entry):
+        kind, size, position = entry
+        if kind != 2:  # ASCII
+            return None
+        if size > 4:
+            position = struct.unpack_from(order + "I", tiff, position)[0]
+        return tiff[position:position + size].split(b"\x00", 1)[0].decode("latin-1") or None
+
+    try:
+        ifd0 = read_ifd(struct.unpack_from(order + "I", tiff, 4)[0])
+        orientation = None
+        if EXIF_ORIENTATION in ifd0 and ifd0[EXIF_ORIENTATION][0] == 3:  # SHORT
+            orientation = struct.unpack_from(order + "H", tiff, ifd0[EXIF_ORIENTATION][2])[0]
+        artist = ascii_value(ifd0[EXIF_ARTIST]) if EXIF_ARTIST in ifd0 else None
+        date = None
+        if EXIF_IFD in ifd0:
+            exif_ifd = read_ifd(struct.unpack_from(order + "I", tiff, ifd0[EXIF_IFD][2])[0])
+            if EXIF_DATETIME_ORIGINAL in exif_ifd:
+                date = ascii_value(exif_ifd[EXIF_DATETIME_ORIGINAL])
+    except struct.error:  # truncated or corrupt EXIF block
+        return NO_EXIF
+    return ExifFields(date, orientation, artist)
+
+def scan_exif_fields(image_paths, workers=EXIF_SCAN_WORKERS):
+    """Read the ExifFields of many photos in parallel. Returns {path: ExifFields, or None if unreadable}."""
+    def read(image_path):
+        try:
+            return read_exif_fields(image_path)
+        except OSError:
+            return None
+
+    image_paths = list(image_paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(image_paths, executor.map(read, image_paths)))
+
+def prescan_timestamps(images_dir, records):
+    """Warn, before rendering starts, about CSV photos that are missing or have no capture timestamp.
+
+    Returns the filenames that would be printed with "NO TIMESTAMP FOUND".
+    """
+    records = list(records)
+    exif = scan_exif_fields(os.path.join(images_dir, record.filename) for record in records)
+    no_exif_date = []
+    no_timestamp = []
+    for record in records:
+        fields = exif[os.path.join(images_dir, record.filename)]
+        if fields is None:
+            print(f"WARNING: {record.filename}: image missing or unreadable")
+        elif not fields.date:
+            no_exif_date.append(record.filename)
+            if record.date is None:
+                no_timestamp.append(record.filename)
+
+    print(f"Pre-scan: {len(records)} photos, {len(no_exif_date)} without an EXIF DateTimeOriginal "
+          f"({len(no_exif_date) - len(no_timestamp)} use the CSV date), {len(no_timestamp)} with no timestamp at all")
+    for filename in no_timestamp:
+        print(f"WARNING: {filename}: NO TIMESTAMP FOUND")
+    return no_timestamp
+
+# One photo in an ImageIndex. captured is the EXIF DateTimeOriginal, or None.
+IndexEntry = collections.namedtuple("IndexEntry", "name size mtime_ns captured")
+
+class ImageIndex:
+    """Sorted index of the photos in a directory, built from a single scan.
+
+    Photos are ordered by capture time (photos without one last, by name) or by
+    name, so the order is the same every session, and position() finds a photo
+    directly. The index is saved to INDEX_FILE in the directory; on the next build,
+    capture dates of photos whose size and mtime are unchanged are reused instead
+    of re-reading their EXIF headers.
+    """
+
+    def __init__(self, images_dir, entries, order=DEFAULT_IMAGE_ORDER):
+        if order == "capture":
+            entries = sorted(entries, key=lambda entry: (entry.captured is None, entry.captured or "", entry.name.casefold()))
+        else:
+            entries = sorted(entries, key=lambda entry: entry.name.casefold())
+        self.images_dir = images_dir
+        self.order = order
+        self.entries = entries
+        self.names = [entry.name for entry in entries]
+        self.positions = {name: position for position, name in enumerate(self.names)}
+
+    @classmethod
+    def build(cls, images_dir, order=DEFAULT_IMAGE_ORDER):
+        index_path = os.path.join(images_dir, INDEX_FILE)
+        saved = {}
+        try:
+            with open(index_path, "r") as file:
+                saved = {entry[0]: IndexEntry(*entry) for entry in json.load(file).get("entries", [])}
+        except (OSError, ValueError, TypeError):
+            pass  # no usable saved index: every photo gets scanned
+
+        entries = []
+        unknown = []
+        with os.scandir(images_dir) as listing:
+            for item in listing:
+                if not item.name.lower().endswith(IMAGE_EXTENSIONS) or not item.is_file():
+                    continue
+                stat = item.stat()
+                previous = saved.get(item.name)
+                if previous and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+                    entries.append(previous)
+                else:
+                    unknown.append(IndexEntry(item.name, stat.st_size, stat.st_mtime_ns, None))
+
+        if unknown:
+            exif = scan_exif_fields(os.path.join(images_dir, entry.name) for entry in unknown)
+            for entry in unknown:
+                fields = exif[os.path.join(images_dir, entry.name)]
+                entries.append(entry._replace(captured=fields.date if fields else None))
 
-        max_text_width = width // 2 - margin # // is floor division
-        wrapped_left_text = wrap_text(left_text, font, max_text_width, draw)
-        wrapped_right_text = wrap_text(right_text, font, max_text_width, draw)
+        index = cls(images_dir, entries, order)
+        if unknown or len(saved) != len(entries):
+            index.save()
+        return index
 
-        # Calculate text height for positioning
-        left_text_height = sum(font_size for line in wrapped_left_text)
-        right_text_height = sum(font_size for line in wrapped_right_text)
+    def save(self):
+        index_path = os.path.join(self.images_dir, INDEX_FILE)
+        try:
+            with open(index_path + ".tmp", "w") as file:
+                json.dump({"version": 1, "entries": [list(entry) for entry in self.entries]}, file)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as e:
+            print(f"Could not save the image index {index_path}: {e}")  # e.g. a read-only share
+
+    def remove(self, names):
+        """Drop photos (e.g. deleted ones) from the index and save it."""
+        names = set(names)
+        self.entries = [entry for entry in self.entries if entry.name not in names]
+        self.names = [entry.name for entry in self.entries]
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self.save()
+
+    def position(self, name):
+        """Position of a photo in the index, or None if it is not in it."""
+        return self.positions.get(name)
+
+    def __len__(self):
+        return len(self.entries)
+
+class PhotoRecord:
+    """A photo opened once and shared by date extraction, preview and annotation.
+
+    EXIF fields, orientation and size come from the file header when the record is
+    created; the pixels are decoded on first use of pixels() and then reused.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.image = self._source = Image.open(path)
+        self.size = self.image.size
+        exif = self.image.getexif()
+        self.date = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL)
+        self.orientation = exif.get(EXIF_ORIENTATION, 1)
+        self.artist = exif.get(EXIF_ARTIST)
+        self._decoded = False
+
+    def pixels(self, max_dimension=None):
+        """Decode the image on first call and return the (shared) PIL image.
+
+        With max_dimension, the image is scaled down so its long edge fits. A JPEG
+        that is not decoded yet is decoded straight at the smallest DCT scale that
+        still covers the target, so the full-size pixels are never materialized.
+        `size` keeps the source dimensions.
+        """
+        if max_dimension and max(self.image.size) > max_dimension:
+            width, height = self.image.size
+            scale = max_dimension / max(width, height)
+            target = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if not self._decoded:
+                self.image.draft(None, target)  # no-op for formats other than JPEG
+                self.image.load()
+                self._decoded = True
+            self.image = self.image.resize(target, Image.BICUBIC)
+        if not self._decoded:
+            self.image.load()
+            self._decoded = True
+        return self.image
+
+    def close(self):
+        self.image.close()
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def layout_text(size, left_text, right_text):
+    """Pick the font for an image size and wrap both text blocks to half the image width.
+
+    Returns (font, margin, wrapped left lines, wrapped right lines).
+    """
+    width, height = size
+    font_size = int(min(width, height) // 40)
+    margin = font_size
+    font = load_font(font_size)
+
+    max_text_width = width // 2 - margin # // is floor division
+    return font, margin, wrap_text(left_text, font, max_text_width), wrap_text(right_text, font, max_text_width)
+
+TEXT_SHADOW_OFFSET = 3  # drop shadow offset in pixels, right and down
+
+# One rasterized line of a text block: its coverage mask ("L") and the offset of the
+# mask's top left corner from the block's anchor (the top of the first line, at its
+# left edge for left aligned blocks and at its right end for right aligned ones).
+# The drop shadow is the same mask, TEXT_SHADOW_OFFSET further right and down.
+TextStamp = collections.namedtuple("TextStamp", "mask dx dy")
+
+def render_band(lines, font, align, fontmode="L"):
+    """Rasterize wrapped lines once into a tuple of TextStamps, one per line that draws anything.
+
+    Lines keep the sub-pixel offsets they have on the photo (masks only move by whole
+    pixels), so stamping them in order gives exactly what draw.text() would.
+    `fontmode` is the target image's ImageDraw fontmode ("1" means no anti-aliasing).
+    """
+    font_size = font.size
+    pad = font_size  # room for glyphs reaching past the line box
+    stamps = []
+    for number, line in enumerate(lines):
+        line_width = text_width(line, font)
+        mask = Image.new("L", (math.ceil(line_width) + 2*pad, font_size + 2*pad))
+        anchor_x = pad if align == "left" else mask.width - pad
+        draw = ImageDraw.Draw(mask)
+        draw.fontmode = fontmode
+        draw.text((anchor_x if align == "left" else anchor_x - line_width, pad), line, fill=255, font=font)
+        bbox = mask.getbbox()
+        if bbox:
+            stamps.append(TextStamp(mask.crop(bbox), bbox[0] - anchor_x, bbox[1] - pad + number*font_size))
+    return tuple(stamps)
+
+def text_band(lines, font, align, fontmode="L"):
+    """The stamps of a block of lines, rendered once and reused for every photo that shares the block."""
+    key = (align, tuple(lines), _font_key(font), fontmode)
+    return _lru_lookup(_band_cache, "band", key, BAND_CACHE_SIZE, lambda: render_band(lines, font, align, fontmode))
+
+def text_stamps(size, text_layout, fontmode="L"):
+    """Place laid-out text on an image of `size`: yields (x, y, mask) for every line, in drawing order."""
+    font, margin, wrapped_left_text, wrapped_right_text = text_layout
+    width, height = size
+    font_size = font.size
+
+    # both blocks end one margin above the bottom, left at the left margin and right at the right one
+    for align, lines, anchor_x in (("left", wrapped_left_text, margin), ("right", wrapped_right_text, width - margin)):
+        anchor_y = height - margin - len(lines)*font_size
+        for stamp in text_band(lines, font, align, fontmode):
+            yield anchor_x + stamp.dx, anchor_y + stamp.dy, stamp.mask
+
+def stamp_text(draw, stamps, offset_y=0):
+    """Draw placed lines with their drop shadow, `offset_y` pixels further up (for a crop of the image)."""
+    for x, y, mask in stamps:
+        y -= offset_y
+        draw.bitmap((x + TEXT_SHADOW_OFFSET, y + TEXT_SHADOW_OFFSET), mask, fill="black")
+        draw.bitmap((x, y), mask, fill="white")
+
+def draw_text(img, text_layout):
+    """Draw laid-out left and right text blocks, with a drop shadow, along the bottom of img.
+
+    Blocks come from the band cache, so glyphs are rasterized once per distinct block
+    (the right block usually repeats from photo to photo) and each line only costs two
+    masked fills on the photo, shadow then text.
+    """
+    draw = ImageDraw.Draw(img)
+    stamp_text(draw, text_stamps(img.size, text_layout, draw.fontmode))
+
+def output_extension(profile, source_extension):
+    """File extension for a print: the one of the profile's format, else the source's."""
+    output_format = (profile or {}).get("format")
+    return OUTPUT_EXTENSIONS[output_format] if output_format else source_extension
+
+def save_options(profile, photo):
+    """Keyword arguments for Image.save() under an output profile."""
+    options = {}
+    if not profile:
+        return options
+    if profile.get("format"):
+        options["format"] = profile["format"]
+    if profile.get("quality") is not None:
+        options["quality"] = profile["quality"]
+    if profile.get("progressive"):
+        options["progressive"] = True
+    if profile.get("optimize"):
+        options["optimize"] = True
+    if profile.get("exif") and photo.image.info.get("exif"):
+        options["exif"] = photo.image.info["exif"]
+    return options
+
+_jpegtran = None
+
+def find_jpegtran():
+    """Path of a jpegtran that supports -drop, or None. Looked up once per process.
+
+    Older builds (libjpeg-turbo before 2.1) have no -drop; their usage text does not
+    list it, so they are ruled out here rather than failing on every photo.
+    """
+    global _jpegtran
+    if _jpegtran is None:
+        _jpegtran = shutil.which("jpegtran") or ""
+        if _jpegtran:
+            try:
+                usage = subprocess.run([_jpegtran, "-help"], capture_output=True, timeout=10)
+                if b"-drop" not in usage.stdout + usage.stderr:
+                    _jpegtran = ""
+            except (OSError, subprocess.SubprocessError):
+                _jpegtran = ""
+    return _jpegtran or None
+
+def annotate_jpeg_lossless(photo, left_text, right_text, output_path, profile):
+    """Annotate a JPEG re-encoding only the MCU rows under the text. Returns False if it cannot.
+
+    jpegtran cuts the bottom strip out of the source without decoding the rest, the
+    text is drawn on the strip, which is encoded with the source's quantization tables
+    and subsampling, and jpegtran drops it back into a copy of the source: every DCT
+    block above the strip is copied unchanged. Needs jpegtran with -drop (libjpeg-turbo
+    2.1+ or IJG libjpeg 9), a baseline or progressive YCbCr/grayscale JPEG and no resizing.
+    """
+    jpegtran = find_jpegtran()
+    image = photo.image
+    max_dimension = profile.get("max_dimension")
+    if (not jpegtran or image.format != "JPEG" or image.mode not in ("RGB", "L")
+            or profile.get("format") not in (None, "JPEG") or (max_dimension and max(photo.size) > max_dimension)):
+        return False
 
-        # Initial position for left, right text
-        left_text_position = (margin, height - margin - left_text_height)
-        right_text_position = (width - margin, height - margin - right_text_height)
+    width, height = photo.size
+    with timed("wrap"):
+        stamps = list(text_stamps(photo.size, layout_text(photo.size, left_text, right_text)))
+    if not stamps:
+        return False
+    # the strip starts on an MCU row boundary, above the highest glyph (shadows are lower)
+    mcu_height = 8 * max(layer[2] for layer in image.layer)
+    strip_top = max(0, min(y for x, y, mask in stamps)) // mcu_height * mcu_height
 
-        # Draw left text
-        for line in wrapped_left_text:
-            draw.text((left_text_position[0]+3, left_text_position[1]+3), line, fill="black", font=font)
-            draw.text(left_text_position, line, fill="white", font=font)
+    try:
+        with timed("decode"):
+            crop = [jpegtran, "-copy", "none", "-crop", f"{width}x{height - strip_top}+0+{strip_top}", photo.path]
+            strip = Image.open(io.BytesIO(subprocess.run(crop, capture_output=True, check=True).stdout))
+            strip.load()
+        with timed("draw"):
+            stamp_text(ImageDraw.Draw(strip), stamps, strip_top)
+        with timed("encode"):
+            # jpegtran -drop only reads the strip from a file
+            with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as file:
+                strip.save(file, format="JPEG", qtables="keep", subsampling="keep")
+            try:
+                drop = [jpegtran, "-copy", "all" if profile.get("exif") else "none",
+                        "-drop", f"+0+{strip_top}", file.name, "-outfile", output_path, photo.path]
+                subprocess.run(drop, capture_output=True, check=True)
+            finally:
+                os.remove(file.name)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        details = e.stderr.decode(errors="replace").strip() if isinstance(e, subprocess.CalledProcessError) else e
+        print(f"Lossless annotation failed for {photo.path} ({details}), re-encoding it instead")
+        return False
+    return True
+
+def annotate_image(photo, left_text, right_text, output_path, profile=None):
+    """Draw the text onto a photo and save it. `photo` is a PhotoRecord or an image path.
+
+    `profile` is one of OUTPUT_PROFILES (or a dict like them); by default the print
+    keeps the source size and Pillow's default encoder settings. The image is scaled
+    down before the text is drawn, so the font is sized for the output. Text is
+    drawn onto the record's decoded pixels in place.
+    """
+    if not isinstance(photo, PhotoRecord):
+        with PhotoRecord(photo) as record:
+            return annotate_image(record, left_text, right_text, output_path, profile)
+
+    profile = profile or {}
+    if profile.get("lossless") and annotate_jpeg_lossless(photo, left_text, right_text, output_path, profile):
+        return
+    with timed("decode"):
+        img = photo.pixels(profile.get("max_dimension"))
+        if profile.get("format") == "JPEG" and img.mode not in ("RGB", "L", "CMYK"):
+            img = img.convert("RGB")  # e.g. PNG or GIF sources saved as JPEG prints
+    with timed("wrap"):
+        text_layout = layout_text(img.size, left_text, right_text)
+    with timed("draw"):
+        draw_text(img, text_layout)
+    with timed("encode"):
+        img.save(output_path, **save_options(profile, photo))
+
+
+# Each annotation field takes the first non-empty value among these CSV columns,
+# so both the old (SourceFile, ...) and the exiftool (FileName, ...) layouts work.
+CSV_FIELD_COLUMNS = {
+    "filename": ("SourceFile", "FileName"),  # Use 'SourceFile' if it exists, else use 'FileName'
+    "location": ("Location",),
+    "description": ("ImageDescription",),
+    "comment": ("UserComment", "Comment"),
+    "date": ("DateTimeOriginal", "Date"),
+    "photographer": ("Photographer", "Artist"),
+}
+# cells treated as empty, the same markers pandas.read_csv treated as missing
+CSV_NA_VALUES = frozenset(("", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+                           "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"))
+
+# The fields of one CSV row needed to annotate its photo; small and cheap to send to a worker.
+CsvRecord = collections.namedtuple("CsvRecord", CSV_FIELD_COLUMNS)
+
+def iter_csv_records(csv_path):
+    """Stream the photo data CSV as CsvRecords, one row at a time.
+
+    The column fallbacks are resolved once from the header, so memory use stays
+    flat however large the exiftool export is. Missing fields are None, except
+    filename which is "".
+    """
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        column_index = {}
+        for index, name in enumerate(header):
+            column_index.setdefault(name.strip(), index)
+        field_indices = [tuple(column_index[column] for column in columns if column in column_index)
+                         for columns in CSV_FIELD_COLUMNS.values()]
+
+        for row in reader:
+            if not row:
+                continue
+            values = []
+            for indices in field_indices:
+                value = None
+                for index in indices:
+                    if index < len(row) and row[index] not in CSV_NA_VALUES:
+                        value = row[index]
+                        break
+                values.append(value)
+            values[0] = values[0] or ""  # filename
+            yield CsvRecord(*values)
+
+def count_csv_rows(csv_path):
+    """Number of data rows in the CSV, for progress reporting (a quick pass that builds no records)."""
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+        return max(sum(1 for row in csv.reader(file) if row) - 1, 0)
+
+def compose_csv_texts(record, exif_date=None):
+    """Build the left and right annotation text for a CSV record."""
+    left_text = ""
+    right_text = ""
+
+    if record.filename:
+        left_text += record.filename + "\n"
+
+    # Do location next:
+    if record.location is not None:
+        left_text += record.location + "\n"
+    elif record.description is not None:
+        right_text += record.description + "\n"
+
+    if record.comment is not None:
+        left_text += record.comment
+
+    if exif_date:
+        # get date from the photo metadata as opposed to the csv file
+        right_text += exif_date + "\n"
+    elif record.date is not None:
+        right_text += record.date + "\n"
+    else:
+        right_text += "NO TIMESTAMP FOUND\n"
+
+    # artist
+    if record.photographer is not None:
+        right_text += record.photographer + "\n"
+
+    right_text += "Municon West Coast"
+    return left_text, right_text
+
+def csv_output_path(prints_dir, record, profile=None):
+    name, extension = os.path.splitext(record.filename)
+    return os.path.join(prints_dir, name + output_extension(profile, extension))  # Adjust output path as required
+
+def render_csv_record(images_dir, prints_dir, record, profile=None):
+    """Annotate the photo for one CSV record. Runs inside a batch worker process.
+
+    Returns (filename, output_path, error, stage times, cache counter changes); error
+    is None on success. Exceptions are caught here so one bad photo never stops the
+    rest of the batch.
+    """
+    filename = record.filename
+    image_path = os.path.join(images_dir, filename)
+    output_path = csv_output_path(prints_dir, record, profile)
+    counters_before = dict(_cache_counters)
+    take_stage_times()
+    error = None
+    try:
+        if not os.path.exists(image_path):
+            error = f"Image not found: {image_path}"
+        else:
+            # "open" reads the header only; the pixels are decoded (and timed) in annotate_image()
+            with timed("open"):
+                photo = PhotoRecord(image_path)
+            with photo:
+                # a missing DateTimeOriginal falls back to the CSV date
+                left_text, right_text = compose_csv_texts(record, photo.date)
+                annotate_image(photo, left_text, right_text, output_path, profile)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    counters = {name: count - counters_before.get(name, 0) for name, count in _cache_counters.items()
+                if count != counters_before.get(name, 0)}
+    return filename, output_path, error, take_stage_times(), counters
+
+class RenderManifest:
+    """The render manifest of a Prints directory: {print name: {"source": ..., "text": ..., "profile": ...}}.
+
+    MANIFEST_FILE holds the manifest as last saved, and every render since is appended
+    to MANIFEST_LOG_FILE as one JSON line, so recording a print costs the same however
+    many the folder already has. save() folds the log into MANIFEST_FILE (written
+    atomically) and removes it; record() does so on its own once the log outgrows
+    the manifest. A line torn by a crash mid-write is ignored.
+    """
+
+    def __init__(self, prints_dir):
+        self.path = os.path.join(prints_dir, MANIFEST_FILE)
+        self.log_path = os.path.join(prints_dir, MANIFEST_LOG_FILE)
+        self.entries = {}
+        self.logged = 0  # lines in the log
+        self._log = None
+        try:
+            with open(self.path, "r") as file:
+                self.entries = json.load(file).get("entries", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        name, entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[name] = entry
+                    self.logged += 1
+        except FileNotFoundError:
+            pass
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def record(self, name, entry):
+        """Store the entry of a print that was just rendered."""
+        self.entries[name] = entry
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write(json.dumps([name, entry]) + "\n")
+        self._log.flush()
+        self.logged += 1
+        if self.logged > max(MANIFEST_SAVE_INTERVAL, len(self.entries)):
+            self.save()
+
+    def save(self):
+        """Write every entry to MANIFEST_FILE and clear the log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"version": 1, "entries": self.entries}, file)
+        os.replace(temp_path, self.path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)  # after the rename: a crash in between only replays entries already saved
+        self.logged = 0
+
+def source_signature(image_path):
+    """Cheap change detector for a source photo: its size and modification time, or None if it is missing."""
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
 
-            left_text_position = (left_text_position[0], left_text_position[1] + font_size)
-        
-        # Draw right text
-        for line in wrapped_right_text:
-            text_width = draw.textlength(line, font=font)
-            right_text_x = width - margin - text_width  # Calculate X so that text ends at the right margin
-            draw.text((right_text_x+3, right_text_position[1]+3), line, fill="black", font=font)
-            draw.text((right_text_x, right_text_position[1]), line, fill="white", font=font)
-            right_text_position = (right_text_x, right_text_position[1] + font_size)
+def text_signature(record):
+    """Hash of the CSV fields the annotation text is built from.
 
-        img.save(output_path)
+    The only other input to the text is the photo's EXIF date, which is covered by
+    the source signature, so together they identify the rendered left/right text.
+    """
+    return hashlib.sha1(json.dumps(record._asdict(), sort_keys=True).encode("utf-8")).hexdigest()
 
+def profile_signature(profile):
+    """Hash of the output profile, so changing the output settings re-renders every print."""
+    return hashlib.sha1(json.dumps(profile or {}, sort_keys=True).encode("utf-8")).hexdigest()
 
+def estimate_render_memory(image_path, profile=None):
+    """Rough peak bytes of rendering a photo under `profile`, from its header alone.
 
+    Counts the decoded pixels (at JPEG draft scale when the profile scales the photo
+    down) and the scaled copy. 0 if the photo cannot be opened,
+    since it will fail in the worker without decoding anything.
+    """
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+            bands = len(image.getbands())
+            is_jpeg = image.format == "JPEG"
+    except Exception:
+        return 0
+    decoded = width*height*bands
+    max_dimension = (profile or {}).get("max_dimension")
+    if not max_dimension or max(width, height) <= max_dimension:
+        return decoded
+    scale = max_dimension / max(width, height)
+    if is_jpeg:
+        # draft decodes at the smallest 1/2, 1/4 or 1/8 scale that still covers the output
+        reduction = max(factor for factor in (1, 2, 4, 8) if factor*scale <= 1)
+        decoded //= reduction*reduction
+    return decoded + math.ceil(width*scale)*math.ceil(height*scale)*bands
+
+class WorkerPool:
+    """A process pool that replaces itself when a worker process dies.
+
+    A worker killed mid-render (out of memory, a crash inside a decoder) breaks a
+    ProcessPoolExecutor for good: every job still in it fails with BrokenProcessPool,
+    and so does every later submit. submit() starts a fresh pool when that happens.
+    Safe to use from several threads, including from done-callbacks. `initializer` and
+    `initargs` are passed to every ProcessPoolExecutor, to set up its worker processes.
+    """
+
+    def __init__(self, workers, initializer=None, initargs=()):
+        self.workers = workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self._lock = threading.Lock()
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer, initargs=self.initargs)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            executor = self.executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                if self.executor is executor:  # not already replaced by another thread
+                    print("A worker process died; starting a new process pool")
+                    executor.shutdown(wait=False)
+                    self.executor = self._new_executor()
+                executor = self.executor
+            return executor.submit(fn, *args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+def _ordered_results(pool, fn, jobs, window, cost=None, budget=None, failed=None):
+    """Submit jobs to the pool, keeping at most `window` in flight, and yield results in submission order.
+
+    With `cost` (job arguments -> estimated bytes) and a `budget`, a job also waits while
+    it would take the estimates of the jobs in flight over the budget; a job over the
+    budget by itself runs alone.
+
+    When a worker process dies, every job in flight fails with it, not only the one that
+    killed it. Those jobs are run again one at a time on a fresh pool, so only a job that
+    still kills its worker when run alone fails; its result is failed(*job, error).
+    """
+    pending = collections.deque()  # (job, future, cost)
+    in_flight = 0
+
+    def run_alone(job):
+        try:
+            return pool.submit(fn, *job).result()
+        except BrokenProcessPool as e:
+            if failed is None:
+                raise
+            return failed(*job, e)
+
+    def next_results():
+        nonlocal in_flight
+        job, future, job_cost = pending.popleft()
+        in_flight -= job_cost
+        if future.exception() is None:
+            yield future.result()
+            return
+        if not isinstance(future.exception(), BrokenProcessPool):
+            future.result()  # raises
+        # the pool is gone: keep what finished before it broke, rerun the rest alone
+        yield run_alone(job)
+        while pending:
+            job, future, job_cost = pending.popleft()
+            yield future.result() if future.exception() is None else run_alone(job)
+        in_flight = 0
+
+    for job in jobs:
+        job_cost = cost(*job) if cost and budget else 0
+        while pending and (len(pending) >= window or (budget and in_flight + job_cost > budget)):
+            yield from next_results()
+        pending.append((job, pool.submit(fn, *job), job_cost))
+        in_flight += job_cost
+    while pending:
+        yield from next_results()
+
+def _csv_job_memory(images_dir, prints_dir, record, profile):
+    return estimate_render_memory(os.path.join(images_dir, record.filename), profile)
+
+def _csv_job_failed(images_dir, prints_dir, record, profile, error):
+    """The render_csv_record() result for a record whose worker process died under it."""
+    return record.filename, csv_output_path(prints_dir, record, profile), f"{type(error).__name__}: {error}", {}, {}
+
+def annotate_batch(images_dir, prints_dir, records, workers=None, overwrite="always", total=None, profile=None, report=None,
+                   executor=None, memory_budget=None, manifest=None):
+    """Annotate all CSV records, spreading the work across a pool of processes.
+
+    `records` may be any iterable, such as the iter_csv_records() stream; pass
+    `total` for a progress count when it has no len(). Progress is printed in
+    CSV order. Photos that fail are reported at the end
+    and returned as a list of (filename, error) pairs.
+
+    overwrite="skip" leaves records whose print already exists alone;
+    overwrite="changed" only renders records whose source photo or annotation
+    text changed since the print was made, according to the manifest kept in
+    the Prints directory. Every successful render is recorded in the manifest.
+    `profile` is the output profile passed on to annotate_image(). Stage timings
+    and counters of every photo are added to `report` (a RunReport) if given.
+    A long-running caller can pass its own WorkerPool as `executor`, and its own
+    RenderManifest as `manifest` (which it then saves itself). A photo that kills
+    its worker process is reported as failed and the batch carries on.
+    `memory_budget` (bytes per worker) holds photos back while the estimated memory
+    of the renders in flight would exceed it times `workers`, so very large photos
+    run with fewer (or no) others alongside.
+    """
+    workers = workers or BATCH_WORKERS
+    if total is None and hasattr(records, "__len__"):
+        total = len(records)
+    failures = []
+    skipped = []
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = RenderManifest(prints_dir)
+    rendering = {}  # filename -> manifest entry to store once its render succeeds
+
+    def pending_jobs():
+        for record in records:
+            filename = record.filename
+            entry = {"source": source_signature(os.path.join(images_dir, filename)), "text": text_signature(record),
+                     "profile": profile_signature(profile)}
+            output_exists = os.path.exists(csv_output_path(prints_dir, record, profile))
+            if output_exists and (overwrite == "skip" or (overwrite == "changed" and manifest.get(filename) == entry)):
+                skipped.append(filename)
+                continue
+            rendering[filename] = entry
+            yield images_dir, prints_dir, record, profile
+
+    jobs = pending_jobs()
+    start_time = time.perf_counter()
+
+    own_executor = None
+    if executor is None and workers > 1:
+        executor = own_executor = WorkerPool(workers)
+    if executor is None:
+        results = (render_csv_record(*job) for job in jobs)
+    else:
+        results = _ordered_results(executor, render_csv_record, jobs, workers * 4, cost=_csv_job_memory,
+                                   budget=memory_budget * workers if memory_budget else None, failed=_csv_job_failed)
+
+    count = 0
+    try:
+        for filename, output_path, error, stage_times, counters in results:
+            count += 1
+            if report:
+                report.add_file(filename, stage_times, counters)
+            done = count + len(skipped)
+            progress = f"[{done}/{total}]" if total else f"[{done}]"
+            entry = rendering.pop(filename, None)
+            if error:
+                failures.append((filename, error))
+                print(f"{progress} FAILED {filename}: {error}")
+            else:
+                print(f"{progress} Annotated image saved: {output_path}")
+                manifest.record(filename, entry)
+    finally:
+        if own_executor:
+            own_executor.shutdown(cancel_futures=True)
+        if own_manifest:
+            manifest.save()
+
+    if report:
+        report.counters.update(annotated=count - len(failures), failed=len(failures), skipped=len(skipped))
+    elapsed = time.perf_counter() - start_time
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"\nBatch complete: {count - len(failures)} annotated, {len(failures)} failed, {len(skipped)} skipped in {elapsed:.1f}s ({rate:.2f} photos/s, {workers} workers)")
+    for filename, error in failures:
+        print(f"  FAILED {filename}: {error}")
+    return failures
+
+
+class SessionJournal:
+    """Append-only journal of a manual annotation session, one JSON object per line.
+
+    Each photo is journaled (and synced to disk) as soon as its fields are entered,
+    before the print is rendered, and marked "rendered" once the print is saved. After
+    a crash or a quit, the next session resumes after the last journaled photo with
+    the same numbering and defaults, and renders whatever was entered but never saved.
+    A session that reached the last photo with every print saved is marked "finished"
+    and is not offered for resuming. A line torn by a crash mid-write is ignored.
+    """
+
+    def __init__(self, images_dir):
+        self.path = os.path.join(images_dir, SESSION_FILE)
+        self.header = None
+        self.records = []  # "entered" and "deleted" records, oldest first
+        self.rendered = set()  # files whose print was saved
+        self.finished = False
+        self._file = None
+        self._torn = False
+        self._lock = threading.Lock()  # background renders mark photos from their callback threads
+
+    def load(self):
+        """Read the journal left by the previous session. Returns False if there is none to resume."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except OSError:
+            return False
+        self._torn = bool(lines) and not lines[-1].endswith("\n")
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line
+            if record.get("event") == "session":
+                self.header = record
+            elif record.get("event") == "rendered":
+                self.rendered.add(record["file"])
+            elif record.get("event") in ("entered", "deleted"):
+                self.records.append(record)
+            elif record.get("event") == "finished":
+                self.finished = True
+        return bool(self.header and self.records) and not self.finished
+
+    def last_entered(self):
+        """The most recent "entered" record, or None."""
+        return next((record for record in reversed(self.records) if record["event"] == "entered"), None)
+
+    def resume_position(self, index):
+        """Index position of the first photo after the last journaled one that is still in the folder."""
+        for record in reversed(self.records):
+            position = index.position(record["file"])
+            if position is not None:
+                return position + 1
+        return 0
+
+    def unrendered(self):
+        """Entered photos whose print was never saved, oldest first."""
+        return [record for record in self.records if record["event"] == "entered" and record["file"] not in self.rendered]
+
+    def start(self, order, resume=False):
+        """Open the journal for appending, or start it over for a new session."""
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._torn:
+            self._file.write("\n")  # end the torn line so the next record starts on its own
+        if not resume:
+            self._append({"event": "session", "order": order, "started": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def entered(self, filename, image_index, output_name, left_text, right_text, defaults):
+        """Journal an entered photo and return its record, which is also the render job for it."""
+        record = {"event": "entered", "file": filename, "image_index": image_index, "output": output_name,
+                  "left": left_text, "right": right_text, "defaults": defaults}
+        self._append(record)
+        return record
+
+    def deleted(self, filename, defaults):
+        self._append({"event": "deleted", "file": filename, "defaults": defaults})
+
+    def mark_rendered(self, filename):
+        self._append({"event": "rendered", "file": filename})
+
+    def finish(self):
+        """Mark the session as complete, so the next one starts over instead of offering to resume it."""
+        self._append({"event": "finished", "ended": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def _append(self, record):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def render_session_entry(images_dir, prints_dir, record, profile=None):
+    """Render a journaled manual entry. Runs in a RenderQueue worker; returns what render_csv_record() does."""
+    filename = record["file"]
+    image_path = os.path.join(images_dir, filename)
+    output_path = os.path.join(prints_dir, record["output"])
+    counters_before = dict(_cache_counters)
+    take_stage_times()
+    error = None
+    try:
+        with timed("open"):
+            photo = PhotoRecord(image_path)
+        with photo:
+            annotate_image(photo, record["left"], record["right"], output_path, profile)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    counters = {name: count - counters_before.get(name, 0) for name, count in _cache_counters.items()
+                if count != counters_before.get(name, 0)}
+    return filename, output_path, error, take_stage_times(), counters
+
+class RenderQueue:
+    """Renders manual-mode prints in a background process pool while the next photo is entered.
+
+    submit() returns at once with a journaled record queued for render_session_entry();
+    finished prints are marked rendered in the journal. status() is what the annotation
+    window's status line shows, and wait() blocks until the queue has drained. With a
+    `memory_budget` (bytes per worker), records wait in the queue while the estimated
+    memory of the renders in flight would exceed it times `workers`. If a worker process
+    dies, the prints it took down with it are failures on the status line (and stay
+    unrendered in the journal) and later prints go to a fresh pool.
+    """
+
+    def __init__(self, images_dir, prints_dir, journal, profile=None, workers=None, memory_budget=None):
+        self.images_dir = images_dir
+        self.prints_dir = prints_dir
+        self.journal = journal
+        self.profile = profile
+        workers = workers or BATCH_WORKERS
+        self.pool = WorkerPool(workers)
+        self.budget = memory_budget * workers if memory_budget else None
+        self.waiting = collections.deque()  # (record, estimated bytes) held back by the memory budget
+        self.in_flight = 0  # estimated bytes of the records handed to the pool
+        self.jobs = []  # (record, future), in submission order
+        self.pending = 0
+        self.saved = 0
+        self.failures = []  # (filename, error)
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+        self._drained.set()
+
+    def submit(self, record):
+        cost = estimate_render_memory(os.path.join(self.images_dir, record["file"]), self.profile) if self.budget else 0
+        with self._lock:
+            self.pending += 1
+            self._drained.clear()
+            self.waiting.append((record, cost))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand waiting records to the pool, in order, while they fit in the budget (one over it runs alone)."""
+        with self._lock:
+            ready = []
+            while self.waiting:
+                record, cost = self.waiting[0]
+                if self.budget and self.in_flight and self.in_flight + cost > self.budget:
+                    break
+                self.waiting.popleft()
+                self.in_flight += cost
+                ready.append((record, cost))
+        # outside the lock: a job that is already done runs its callback right here
+        for position, (record, cost) in enumerate(ready):
+            try:
+                future = self.pool.submit(render_session_entry, self.images_dir, self.prints_dir, record, self.profile)
+            except (BrokenProcessPool, RuntimeError) as e:
+                # not even a fresh pool takes work: fail everything not yet handed to it, so wait()
+                # still returns (records in flight fail through their own callbacks)
+                with self._lock:
+                    self.in_flight -= sum(cost for record, cost in ready[position:])
+                    failed = [record for record, cost in ready[position:] + list(self.waiting)]
+                    self.waiting.clear()
+                self._fail(failed, e)
+                return
+            self.jobs.append((record, future))
+            future.add_done_callback(lambda future, record=record, cost=cost: self._finished(record, cost, future))
+
+    def _fail(self, records, error):
+        """Record journaled records that never reached a worker as failed."""
+        for record in records:
+            future = Future()
+            future.set_exception(error)
+            self.jobs.append((record, future))
+            print(f"FAILED {record['file']}: {type(error).__name__}: {error}")
+            with self._lock:
+                self.pending -= 1
+                self.failures.append((record["file"], f"{type(error).__name__}: {error}"))
+                if not self.pending:
+                    self._drained.set()
+
+    def _result(self, record, future):
+        """The render_session_entry() result of a finished job, also when its worker process died."""
+        if future.exception() is not None:
+            error = f"{type(future.exception()).__name__}: {future.exception()}"
+            return record["file"], os.path.join(self.prints_dir, record["output"]), error, {}, {}
+        return future.result()
+
+    def _finished(self, record, cost, future):
+        filename, output_path, error, stage_times, counters = self._result(record, future)
+        if error:
+            print(f"FAILED {filename}: {error}")
+        else:
+            self.journal.mark_rendered(filename)
+            print(f"Annotated image saved: {output_path}")
+        with self._lock:
+            self.pending -= 1
+            self.in_flight -= cost
+            if error:
+                self.failures.append((filename, error))
+            else:
+                self.saved += 1
+            if not self.pending:
+                self._drained.set()
+        self._dispatch()
+
+    def status(self):
+        """(prints still rendering, prints saved, failures) so far."""
+        with self._lock:
+            return self.pending, self.saved, list(self.failures)
+
+    def status_text(self):
+        pending, saved, failures = self.status()
+        text = f"Rendering {pending} print(s) in the background, {saved} saved" if pending else f"All {saved} print(s) saved"
+        if failures:
+            text += f", {len(failures)} FAILED (last: {failures[-1][0]})"
+        return text
+
+    def wait(self):
+        """Wait for every queued print and shut the pool down. Returns the results in the order they started."""
+        if self.pending:
+            print(f"Waiting for {self.pending} print(s) still rendering...")
+        self._drained.wait()
+        results = [self._result(record, future) for record, future in self.jobs]
+        self.pool.shutdown()
+        return results
+
+
+class FolderWatcher:
+    """Finds new or changed photos in an image directory by polling, cheaply enough for huge folders.
+
+    The listing is only re-read when the directory's own mtime changes (a photo was
+    added, removed or replaced), and it is compared using only what the listing gives
+    for free, so unchanged photos are never stat()ed. Photos still being uploaded are
+    held back until their size and mtime have been stable for `settle_time` seconds.
+    A full stat() rescan every WATCH_RESCAN_INTERVAL catches photos overwritten in
+    place, which does not touch the directory mtime.
+    """
+
+    def __init__(self, images_dir, settle_time=WATCH_SETTLE_TIME, rescan_interval=WATCH_RESCAN_INTERVAL):
+        self.images_dir = images_dir
+        self.settle_time = settle_time
+        self.rescan_interval = rescan_interval
+        self.known = {}  # filename -> (size, mtime_ns) of photos already handed out
+        self.tokens = {}  # filename -> change token from the directory listing, see _listing()
+        self.settling = {}  # filename -> ((size, mtime_ns), time that signature was first seen)
+        self.dir_mtime = None
+        self.last_rescan = time.monotonic()
+
+    def _stat(self, filename):
+        try:
+            stat = os.stat(os.path.join(self.images_dir, filename))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _listing(self):
+        """{filename: change token} for the photos in the folder.
+
+        On Windows the listing carries size and mtime; elsewhere it carries the inode
+        number, which changes when an upload replaces a photo by renaming over it.
+        """
+        listing = {}
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    if os.name == "nt":
+                        stat = entry.stat()
+                        listing[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                    else:
+                        listing[entry.name] = entry.inode()
+        return listing
+
+    def prime(self):
+        """Take the current folder contents as the baseline (they are handled by the catch-up batch).
+
+        Photos modified less than `settle_time` ago (or still empty) may be mid-upload, so
+        they start out settling instead, and poll() hands them out once they are stable.
+        """
+        now = time.monotonic()
+        wall_now = time.time_ns()
+        self.dir_mtime = os.stat(self.images_dir).st_mtime_ns
+        self.tokens = self._listing()
+        for name in self.tokens:
+            signature = self._stat(name)
+            if not signature:
+                continue
+            age = (wall_now - signature[1]) / 1e9
+            if age < self.settle_time or signature[0] == 0:
+                # count the time it has already been unchanged towards settling
+                self.settling[name] = (signature, now - max(age, 0))
+            else:
+                self.known[name] = signature
+
+    def poll(self):
+        """Return the names of photos that are new or changed and have finished settling."""
+        now = time.monotonic()
+        dir_mtime = os.stat(self.images_dir).st_mtime_ns
+        if dir_mtime != self.dir_mtime:
+            self.dir_mtime = dir_mtime
+            tokens = self._listing()
+            for name in list(self.known):
+                if name not in tokens:
+                    del self.known[name]
+            for name, token in tokens.items():
+                if self.tokens.get(name) != token and name not in self.settling:
+                    self.settling[name] = (self._stat(name), now)
+            self.tokens = tokens
+
+        if now - self.last_rescan >= self.rescan_interval:
+            self.last_rescan = now
+            for name, signature in list(self.known.items()):
+                current = self._stat(name)
+                if current is None:
+                    del self.known[name]
+                elif current != signature and name not in self.settling:
+                    self.settling[name] = (current, now)
+
+        ready = []
+        for name, (signature, since) in list(self.settling.items()):
+            current = self._stat(name)
+            if current is None:
+                del self.settling[name]  # removed before it finished uploading
+            elif current != signature:
+                self.settling[name] = (current, now)  # still being written
+            elif now - since >= self.settle_time and current[0] > 0:
+                del self.settling[name]
+                self.known[name] = current
+                ready.append(name)
+        return ready
 
 tkinter_running = True
-root = tk.Tk()
+root = None
+
+def get_root():
+    """Create the hidden Tk root on first use, so batch worker processes never start Tk."""
+    global root
+    if root is None:
+        root = tk.Tk()
+        root.withdraw()  # Hide the main window
+        root.protocol("WM_DELETE_WINDOW", on_quit)
+    return root
 
-root.withdraw()  # Hide the main window
 def on_quit():
     global tkinter_running
+    pending = render_queue.status()[0] if render_queue else 0
+    if pending:
+        messagebox.showwarning("Quit", f"{pending} print(s) are still being rendered.\nQuit again once the status line shows all prints saved.")
+        return
     if messagebox.askokcancel("Quit", "Do you really want to quit?"):
         tkinter_running = False
+        close_annotation_window()
         root.destroy()
         sys.exit(0)
 
-root.protocol("WM_DELETE_WINDOW", on_quit)
+def select_starting_image(image_dir, index=None):
+    """Show the folder as a contact sheet and return the photo picked to start at, or None.
 
-def select_starting_image(image_dir):
-    image_list = [filename for filename in os.listdir(image_dir) if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))]
-    if not image_list:
-        return None
-
-    root = tk.Tk()
-    root.withdraw()  # Hide the main window
-    starting_image = filedialog.askopenfilename(initialdir=image_dir, title='MANUAL: SELECT STARTING IMAGE...', filetypes=[('Image Files', '*.png;*.jpg;*.jpeg;*.gif')])
-    if not starting_image:
+    Photos deleted from the sheet are also removed from `index`.
+    """
+    index = index if index is not None else ImageIndex.build(image_dir)
+    if not index:
         return None
+    return ContactSheet(image_dir, index).ask()
+
+def preview_image(image, preview_width):
+    """Return the on-screen preview of an image: landscape, `preview_width` pixels wide."""
+    width, height = image.size
+    # if the image is vertically oriented, rotate it; scaled first, so only the small preview is turned
+    if height > width:
+        preview = image.resize((width * preview_width // height, preview_width), Image.LANCZOS)
+        return preview.transpose(Image.Transpose.ROTATE_90)
+
+    return image.resize((preview_width, height * preview_width // width), Image.LANCZOS)
+
+def placeholder_preview(preview_width, message):
+    """A grey landscape preview with `message` on it, for photos that cannot be shown."""
+    image = Image.new("RGB", (preview_width, preview_width * 3 // 4), "gray")
+    draw = ImageDraw.Draw(image)
+    left, top, right, bottom = draw.textbbox((0, 0), message)
+    draw.text(((image.width - right) // 2, (image.height - bottom) // 2), message, fill="white")
+    return image
+
+def load_preview(image_path, preview_width):
+    """Open a photo and build its preview, decoding JPEGs in draft mode at (close to) preview size."""
+    with Image.open(image_path) as image:
+        # the long side becomes the preview width, so draft just large enough to cover it
+        scale = preview_width / max(image.size)
+        if scale < 1:
+            image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        return preview_image(image, preview_width)
+
+def thumbnail_path(images_dir, entry):
+    """Cache file of an IndexEntry's thumbnail; the name changes whenever the photo's path, mtime or size does."""
+    key = f"{os.path.abspath(os.path.join(images_dir, entry.name))}|{entry.mtime_ns}|{entry.size}"
+    return os.path.join(images_dir, THUMBNAIL_CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+def load_thumbnail(images_dir, entry, cache=True):
+    """The contact sheet thumbnail of an IndexEntry, from the thumbnail cache or decoded in draft mode and cached.
+
+    With cache=False (no usable cache directory) it is always decoded and never written.
+    """
+    cache_path = thumbnail_path(images_dir, entry)
+    if cache:
+        try:
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached
+        except OSError:
+            pass  # not cached yet
+    with Image.open(os.path.join(images_dir, entry.name)) as image:
+        image.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))  # decodes JPEGs at 1/2 to 1/8 scale
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        thumbnail = image.convert("RGB")
+    if not cache:
+        return thumbnail
+    try:
+        # write under a temporary name so a concurrent or interrupted fill never leaves half a file
+        thumbnail.save(cache_path + ".tmp", format="JPEG", quality=85)
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError as e:
+        print(f"Could not cache the thumbnail of {entry.name}: {e}")
+    return thumbnail
+
+def load_thumbnails(images_dir, entries, workers=THUMBNAIL_WORKERS):
+    """Thumbnails of IndexEntries ({name: image, or None if it could not be read}), loaded in parallel.
+
+    Cached thumbnails of photos that are no longer in `entries` are removed. If the
+    cache directory cannot be created (e.g. a read-only share), every thumbnail is
+    decoded and nothing is cached.
+    """
+    cache_dir = os.path.join(images_dir, THUMBNAIL_CACHE_DIR)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache = True
+    except OSError as e:
+        print(f"Could not create the thumbnail cache {cache_dir}, thumbnails will not be cached: {e}")
+        cache = False
 
-    return os.path.basename(starting_image)
+    def load(entry):
+        try:
+            return load_thumbnail(images_dir, entry, cache)
+        except Exception as e:
+            print(f"Could not read {entry.name}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail") as executor:
+        thumbnails = dict(zip((entry.name for entry in entries), executor.map(load, entries)))
+    if not cache:
+        return thumbnails
+
+    current = {os.path.basename(thumbnail_path(images_dir, entry)) for entry in entries}
+    for name in os.listdir(cache_dir):
+        if name not in current:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+    return thumbnails
+
+class PreviewPrefetcher:
+    """Decodes the previews of the next PREFETCH_COUNT photos on a background thread.
+
+    Only PIL images are produced off the UI thread; the Tk PhotoImage is still
+    created by show_image_and_get_input().
+    """
+
+    def __init__(self, images_dir, filenames, preview_width, depth=PREFETCH_COUNT):
+        self.images_dir = images_dir
+        self.filenames = filenames
+        self.positions = {filename: position for position, filename in enumerate(filenames)}
+        self.preview_width = preview_width
+        self.depth = depth
+        self._futures = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+
+    def _schedule(self, position):
+        for filename in self.filenames[position:position + self.depth + 1]:
+            if filename not in self._futures:
+                image_path = os.path.join(self.images_dir, filename)
+                self._futures[filename] = self._executor.submit(load_preview, image_path, self.preview_width)
+
+    def get(self, filename):
+        """Return the preview for filename (waiting if it is still decoding) and queue the ones after it.
+
+        Returns None if the photo is unknown or could not be decoded; the caller then
+        builds the preview itself.
+        """
+        position = self.positions.get(filename)
+        if position is None:
+            return None
+        self._schedule(position)
+        future = self._futures.pop(filename)
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Preview prefetch failed for {filename}: {e}")
+            return None
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
+
+class ContactSheet:
+    """A scrollable thumbnail grid of a folder, in index order.
+
+    Click a photo to select it and "Start here" (or double-click it) to start
+    annotating there. Right-click (or Ctrl+click) marks photos for deletion;
+    "Delete marked" deletes them all at once after a confirmation.
+    """
+
+    COLUMNS_MAX = 12
+    CELL_PADDING = 8
+    LABEL_HEIGHT = 18
+
+    def __init__(self, images_dir, index):
+        self.images_dir = images_dir
+        self.index = index
+        start_time = time.perf_counter()
+        self.thumbnails = load_thumbnails(images_dir, index.entries)
+        print(f"Loaded {len(self.thumbnails)} thumbnails in {time.perf_counter() - start_time:.1f}s")
+        self.photo_images = {}  # name -> Tk PhotoImage, kept referenced while shown
+        self.selected = None
+        self.marked = set()
+        self.result = None
+
+        self.window = tk.Toplevel(get_root())
+        self.window.title("MANUAL: SELECT STARTING IMAGE (right-click marks photos for deletion)")
+        self.window.protocol("WM_DELETE_WINDOW", self._cancel)
+        self.done = tk.IntVar(self.window, 0)
+
+        self.cell_width = THUMBNAIL_SIZE + 2*self.CELL_PADDING
+        self.cell_height = THUMBNAIL_SIZE + self.LABEL_HEIGHT + 2*self.CELL_PADDING
+        self.columns = max(1, min(self.COLUMNS_MAX, int(self.window.winfo_screenwidth()*0.8) // self.cell_width))
+        rows_shown = max(1, int(self.window.winfo_screenheight()*0.7) // self.cell_height)
+
+        buttons = tk.Frame(self.window)
+        buttons.pack(side=tk.BOTTOM, fill=tk.X)
+        self.start_button = tk.Button(buttons, text="Start here", state=tk.DISABLED, command=self._start)
+        self.start_button.pack(side=tk.LEFT, padx=5, pady=5)
+        tk.Button(buttons, text="Start at the first photo", command=self._cancel).pack(side=tk.LEFT, padx=5, pady=5)
+        self.delete_button = tk.Button(buttons, text="Delete marked", state=tk.DISABLED, command=self._delete_marked)
+        self.delete_button.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.status_label = tk.Label(buttons, anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        scrollbar = tk.Scrollbar(self.window, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(self.window, width=self.columns*self.cell_width, height=rows_shown*self.cell_height,
+                                yscrollcommand=scrollbar.set, background="gray20", highlightthickness=0)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.canvas.yview)
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", lambda event: self._start())
+        self.canvas.bind("<Button-3>", self._on_mark)
+        self.canvas.bind("<Control-Button-1>", self._on_mark)
+        self.canvas.bind("<MouseWheel>", lambda event: self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))  # X11 wheel
+        self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+        self._draw()
+
+    def _cell(self, position):
+        row, column = divmod(position, self.columns)
+        return column*self.cell_width, row*self.cell_height
+
+    def _draw(self):
+        """Lay out the whole grid again (after deletions, positions shift)."""
+        self.canvas.delete("all")
+        for position, name in enumerate(self.index.names):
+            x, y = self._cell(position)
+            thumbnail = self.thumbnails.get(name)
+            if thumbnail is not None:
+                if name not in self.photo_images:
+                    self.photo_images[name] = ImageTk.PhotoImage(thumbnail)
+                self.canvas.create_image(x + self.cell_width//2, y + self.CELL_PADDING + THUMBNAIL_SIZE//2,
+                                         image=self.photo_images[name])
+            else:
+                self.canvas.create_text(x + self.cell_width//2, y + self.CELL_PADDING + THUMBNAIL_SIZE//2,
+                                        text="unreadable", fill="white")
+            self.canvas.create_text(x + self.cell_width//2, y + self.CELL_PADDING + THUMBNAIL_SIZE + self.LABEL_HEIGHT//2,
+                                    text=name if len(name) <= 24 else name[:21] + "...", fill="white")
+            if name in self.marked:
+                self._draw_mark(position)
+        if self.selected is not None:
+            self._draw_selection()
+        rows = math.ceil(len(self.index.names) / self.columns)
+        self.canvas.config(scrollregion=(0, 0, self.columns*self.cell_width, rows*self.cell_height))
+        self._update_status()
+
+    def _draw_mark(self, position):
+        x, y = self._cell(position)
+        self.canvas.create_rectangle(x + 3, y + 3, x + self.cell_width - 3, y + self.cell_height - 3,
+                                     outline="red", width=3, tags=f"mark{position}")
+        self.canvas.create_text(x + self.cell_width - 14, y + 14, text="X", fill="red", font=("Arial", 14, "bold"),
+                                tags=f"mark{position}")
+
+    def _draw_selection(self):
+        self.canvas.delete("selection")
+        x, y = self._cell(self.index.position(self.selected))
+        self.canvas.create_rectangle(x + 1, y + 1, x + self.cell_width - 1, y + self.cell_height - 1,
+                                     outline="yellow", width=2, tags="selection")
+
+    def _position_at(self, event):
+        column = int(self.canvas.canvasx(event.x)) // self.cell_width
+        position = int(self.canvas.canvasy(event.y)) // self.cell_height * self.columns + column
+        return position if column < self.columns and 0 <= position < len(self.index.names) else None
+
+    def _on_click(self, event):
+        position = self._position_at(event)
+        if position is not None:
+            self.selected = self.index.names[position]
+            self._draw_selection()
+            self._update_status()
+
+    def _on_mark(self, event):
+        position = self._position_at(event)
+        if position is None:
+            return
+        name = self.index.names[position]
+        if name in self.marked:
+            self.marked.discard(name)
+            self.canvas.delete(f"mark{position}")
+        else:
+            self.marked.add(name)
+            self._draw_mark(position)
+        self._update_status()
+
+    def _update_status(self):
+        text = f"{len(self.index.names)} photos"
+        if self.selected:
+            text += f", start at {self.selected} ({self.index.position(self.selected) + 1})"
+        self.status_label.config(text=text)
+        self.start_button.config(state=tk.NORMAL if self.selected else tk.DISABLED)
+        self.delete_button.config(text=f"Delete marked ({len(self.marked)})", state=tk.NORMAL if self.marked else tk.DISABLED)
+
+    def _delete_marked(self):
+        if not messagebox.askyesno("Delete photos", f"Permanently delete {len(self.marked)} marked photo(s)?",
+                                   parent=self.window):
+            return
+        deleted = []
+        for name in sorted(self.marked):
+            try:
+                os.remove(os.path.join(self.images_dir, name))
+                deleted.append(name)
+                print(f"Deleted {name}")
+            except OSError as e:
+                print(f"Could not delete {name}: {e}")
+        self.index.remove(deleted)
+        for name in deleted:
+            self.photo_images.pop(name, None)
+        self.marked.clear()
+        if self.selected in deleted:
+            self.selected = None
+        self._draw()
+
+    def _start(self):
+        if self.selected:
+            self.result = self.selected
+            self.done.set(1)
+
+    def _cancel(self):
+        self.result = None
+        self.done.set(1)
+
+    def ask(self):
+        """Wait until a starting photo is picked; returns its name, or None to start at the first photo."""
+        self.window.wait_variable(self.done)
+        self.window.destroy()
+        return self.result
 
 def save_window_position(window):
     position = f"+{window.winfo_x()}+{window.winfo_y()}"
@@ -167,175 +1831,153 @@ def load_window_position(window):
             config = json.load(file)
             window.geometry(config["position"])    
 
-def show_image_and_get_input(image_path, default_location="", default_comment="", default_photographer="", default_address=""):
+class AnnotationWindow:
+    """The manual-mode annotation window, built once and reused for every photo.
+
+    ask() swaps in the next preview and resets the input fields instead of building
+    a new Toplevel per photo. The window position is only written to CONFIG_FILE by
+    close(), at the end of the session.
+    """
+
+    FIELDS = ("address", "location", "comment", "photographer")
+
+    def __init__(self):
+        self.window = tk.Toplevel(get_root())
+        self.window.protocol("WM_DELETE_WINDOW", on_quit)  # Set the same quit protocol for the Toplevel window
+        # Disable window resizing
+        self.window.resizable(False, False)
+        self.positioned = False
+        self.photo_image = None  # Keep a reference to the photo object to prevent garbage collection
+        self.result = None
+        self.answered = tk.IntVar(self.window, 0)
+
+        self.label = tk.Label(self.window)
+        self.label.pack()
+        # queue depth and failures of the background renders, refreshed while the window is open
+        self.status_label = tk.Label(self.window, anchor="w")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        self._refresh_status()
+
+        # Create a frame for each input group, with the field and its default
+        self.entries = {}
+        self.default_entries = {}
+        for field in self.FIELDS:
+            frame = tk.Frame(self.window)
+            frame.pack(side=tk.LEFT, padx=5, pady=5)
+            tk.Label(frame, text=f"{field.capitalize()}:").pack(side=tk.TOP, anchor="w")
+            self.entries[field] = tk.Entry(frame)
+            self.entries[field].pack(side=tk.TOP)
+            tk.Label(frame, text=f"Default {field.capitalize()}:").pack(side=tk.TOP, anchor="w")
+            self.default_entries[field] = tk.Entry(frame)
+            self.default_entries[field].pack(side=tk.TOP)
+
+        # "Save" retrieves the input, "Delete" deletes the current photo and moves to the next one
+        self.save_button = tk.Button(self.window, text="Save", command=self._save)
+        self.save_button.pack(side=tk.LEFT, padx=5)
+        self.delete_button = tk.Button(self.window, text="Delete", command=self._delete)
+        self.delete_button.pack(side=tk.RIGHT, padx=5)
+
+    def _refresh_status(self):
+        self.status_label.config(text=render_queue.status_text() if render_queue else "")
+        self._status_job = self.window.after(STATUS_REFRESH_MS, self._refresh_status)
+
+    def _answer(self, result):
+        self.result = result
+        # ignore further clicks until the next photo is shown
+        self.save_button.config(state=tk.DISABLED)
+        self.delete_button.config(state=tk.DISABLED)
+        self.answered.set(self.answered.get() + 1)
+
+    def _save(self):
+        values = {field: entry.get() for field, entry in self.entries.items()}
+        defaults = {field: entry.get() for field, entry in self.default_entries.items()}
+        self._answer((values, defaults))
+
+    def _delete(self):
+        self._answer("DELETE")
+
+    def _place(self, image):
+        """Position the window the first time it is shown: saved position, else centered on screen."""
+        if os.path.exists(CONFIG_FILE):
+            load_window_position(self.window)
+        else:
+            screen_width = self.window.winfo_screenwidth()
+            screen_height = self.window.winfo_screenheight()
+            x_coordinate = int((screen_width / 2) - (image.width / 2))
+            y_coordinate = int((screen_height / 2) - ((image.height + 100) / 2))
+            self.window.geometry(f"+{x_coordinate}+{y_coordinate}")
+        self.positioned = True
+
+    def ask(self, image_path, defaults, preview=None):
+        """Show a photo and wait for Save or Delete.
+
+        Returns "DELETE", or a (values, defaults) pair of dicts keyed by FIELDS.
+        """
+        self.window.title(os.path.basename(image_path))
+
+        # Display the image (already decoded and downsized by the prefetcher when available,
+        # else decoded here at reduced resolution; the full-size pixels are never needed)
+        with timed("preview"):
+            if preview is not None:
+                image = preview
+            else:
+                preview_width = round(self.window.winfo_screenwidth()/2)
+                try:
+                    image = load_preview(image_path, preview_width)
+                except Exception as e:
+                    # the photo can still be annotated, its print is rendered (or fails) in a worker
+                    print(f"Could not show {image_path}: {e}")
+                    image = placeholder_preview(preview_width, f"No preview: {type(e).__name__}")
+            self.photo_image = ImageTk.PhotoImage(image)
+            self.label.config(image=self.photo_image)
+            if not self.positioned:
+                self._place(image)
+
+        # Preset every field and its default to the current default
+        for field in self.FIELDS:
+            for entry in (self.entries[field], self.default_entries[field]):
+                entry.delete(0, tk.END)
+                entry.insert(0, defaults[field])
+
+        self.save_button.config(state=tk.NORMAL)
+        self.delete_button.config(state=tk.NORMAL)
+        with timed("input"):
+            self.window.wait_variable(self.answered)  # Wait here until Save or Delete is clicked
+        return self.result
+
+    def close(self):
+        self.window.after_cancel(self._status_job)
+        save_window_position(self.window)  # Save the window position
+        self.window.destroy()
+
+annotation_window = None
+render_queue = None  # the manual session's RenderQueue, checked by on_quit()
+
+def close_annotation_window():
+    """Save the annotation window position and destroy it, if it was ever opened."""
+    global annotation_window
+    if annotation_window is not None:
+        annotation_window.close()
+        annotation_window = None
+
+def show_image_and_get_input(image_path, default_location="", default_comment="", default_photographer="", default_address="", preview=None):
+    global annotation_window
     if not tkinter_running:
         return None, None, None, None, None, None, None, None  # Exit function if tkinter_running is False
-    
-    # Variables to hold input values
-    default_location_input = None
-    default_comment_input = None
-    default_photographer_input = None
-    default_address_input = None
-    location_input = None
-    comment_input = None
-    photographer_input = None
-    address_input = None
-
-    def on_window_close():
-        nonlocal photo
-        label.config(image=None)
-        photo = None
-        save_window_position(tk_window)  # Save the window position
-        tk_window.destroy()
-    
-    def delete_and_continue():
-        nonlocal location_input, comment_input, photographer_input, address_input, default_location_input, default_comment_input, default_photographer_input, default_address_input
-        location_input = "DELETE"
-        comment_input = "DELETE"
-        photographer_input = "DELETE"
-        address_input = "DELETE"
-        default_location_input = default_location
-        default_comment_input = default_comment
-        default_photographer_input = default_photographer
-        default_address_input = default_address
-        on_window_close()
-
-    def save_and_continue():
-        nonlocal location_input, comment_input, photographer_input, address_input, default_location_input, default_comment_input, default_photographer_input, default_address_input
-
-        # Retrieve input from entry fields
-        default_location_input = default_location_entry.get()
-        default_comment_input = default_comment_entry.get()
-        default_photographer_input = default_photographer_entry.get()
-        default_address_input = default_address_entry.get()
-
-        location_input = location_entry.get()
-        comment_input = comment_entry.get()
-        photographer_input = photographer_entry.get()
-        address_input = address_entry.get()
-        on_window_close()
-
-    # Create a top-level window
-    tk_window = tk.Toplevel(root)
-    tk_window.title(os.path.basename(image_path))
-    tk_window.protocol("WM_DELETE_WINDOW", on_quit)  # Set the same quit protocol for the Toplevel window
-
-    screen_width = tk_window.winfo_screenwidth()
-    screen_height = tk_window.winfo_screenheight()
-
-    # Disable window resizing
-    tk_window.resizable(False, False)
-
-    # Open and display the image
-    image = Image.open(image_path)
-    # if the image is vertically oriented, rotate it
-    if image.height > image.width:
-        image = image.rotate(90, expand=True)
-
-    image = image.resize((round(screen_width/2), image.height * round(screen_width/2) // image.width), Image.LANCZOS)
-
-    photo = ImageTk.PhotoImage(image)
-
-    # Set the window size and position
-    window_width = round(image.width)
-    window_height = round(image.height+100)
-
-    # Load the saved window position if it exists, otherwise set the initial position
-    if not os.path.exists(CONFIG_FILE):
-        x_coordinate = int((screen_width / 2) - (window_width / 2))
-        y_coordinate = int((screen_height / 2) - (window_height / 2))
-        tk_window.geometry(f"{window_width}x{window_height}+{x_coordinate}+{y_coordinate}")
-    else:
-        load_window_position(tk_window)
-
-    label = tk.Label(tk_window, image=photo)
-    label.pack()
-
-    # Keep a reference to the photo object to prevent garbage collection
-    # label.image = photo
-
-    # Create frames for each input group
-    address_frame = tk.Frame(tk_window)
-    address_frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-    location_frame = tk.Frame(tk_window)
-    location_frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-    comment_frame = tk.Frame(tk_window)
-    comment_frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-    photographer_frame = tk.Frame(tk_window)
-    photographer_frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-    # Address
-    address_label = tk.Label(address_frame, text="Address:")
-    address_label.pack(side=tk.TOP, anchor="w")
-    address_entry = tk.Entry(address_frame)
-    address_entry.pack(side=tk.TOP)
-    address_entry.insert(0, default_address)  # Preset the default address
-
-    # Default Address
-    default_address_label = tk.Label(address_frame, text="Default Address:")
-    default_address_label.pack(side=tk.TOP, anchor="w")
-    default_address_entry = tk.Entry(address_frame)
-    default_address_entry.pack(side=tk.TOP)
-    default_address_entry.insert(0, default_address)  # Preset the default address
-
-    # Location
-    location_label = tk.Label(location_frame, text="Location:")
-    location_label.pack(side=tk.TOP, anchor="w")
-    location_entry = tk.Entry(location_frame)
-    location_entry.pack(side=tk.TOP)
-    location_entry.insert(0, default_location)  # Preset the default location
-
-    # Default Location
-    default_location_label = tk.Label(location_frame, text="Default Location:")
-    default_location_label.pack(side=tk.TOP, anchor="w")
-    default_location_entry = tk.Entry(location_frame)
-    default_location_entry.pack(side=tk.TOP)
-    default_location_entry.insert(0, default_location)  # Preset the default location
-
-    # Comment
-    comment_label = tk.Label(comment_frame, text="Comment:")
-    comment_label.pack(side=tk.TOP, anchor="w")
-    comment_entry = tk.Entry(comment_frame)
-    comment_entry.pack(side=tk.TOP)
-    comment_entry.insert(0, default_comment)  # Preset the default comment
-
-    # Default Comment
-    default_comment_label = tk.Label(comment_frame, text="Default Comment:")
-    default_comment_label.pack(side=tk.TOP, anchor="w")
-    default_comment_entry = tk.Entry(comment_frame)
-    default_comment_entry.pack(side=tk.TOP)
-    default_comment_entry.insert(0, default_comment)  # Preset the default comment
-
-    # Photographer
-    photographer_label = tk.Label(photographer_frame, text="Photographer:")
-    photographer_label.pack(side=tk.TOP, anchor="w")
-    photographer_entry = tk.Entry(photographer_frame)
-    photographer_entry.pack(side=tk.TOP)
-    photographer_entry.insert(0, default_photographer)  # Preset the default photographer
-
-    # Default Photographer
-    default_photographer_label = tk.Label(photographer_frame, text="Default Photographer:")
-    default_photographer_label.pack(side=tk.TOP, anchor="w")
-    default_photographer_entry = tk.Entry(photographer_frame)
-    default_photographer_entry.pack(side=tk.TOP)
-    default_photographer_entry.insert(0, default_photographer)  # Preset the default photographer
-
-    # Create a "Save" or "OK" button that retrieves input and closes the window
-    save_button = tk.Button(tk_window, text="Save", command=save_and_continue)
-    save_button.pack(side=tk.LEFT, padx=5)
-
-    # Create a "Delete" button that deletes the current photo and moves to the next one
-    delete_button = tk.Button(tk_window, text="Delete", command=delete_and_continue)
-    delete_button.pack(side=tk.RIGHT, padx=5)
-
-    tk_window.wait_window()  # Wait here until the window is closed
-
-    return location_input, comment_input, photographer_input, address_input, default_location_input, default_comment_input, default_photographer_input, default_address_input
-
-def main():
+
+    if annotation_window is None:
+        annotation_window = AnnotationWindow()
+    defaults = {"address": default_address, "location": default_location, "comment": default_comment, "photographer": default_photographer}
+    result = annotation_window.ask(image_path, defaults, preview)
+
+    if result == "DELETE":
+        return "DELETE", "DELETE", "DELETE", "DELETE", default_location, default_comment, default_photographer, default_address
+    values, defaults = result
+    return (values["location"], values["comment"], values["photographer"], values["address"],
+            defaults["location"], defaults["comment"], defaults["photographer"], defaults["address"])
+
+def run_interactive(workers=None, profile=None, order=DEFAULT_IMAGE_ORDER, memory_budget=None, overwrite="always",
+                    prescan=False):
     print('\n')
 
     print("                 ████████████████                 ")
@@ -382,35 +2024,81 @@ def main():
     csv_path = select_csv_file()
     if not csv_path:
         print("\nNO CSV SELECTED: Assuming manual input. ")
-        # prompt for the starting image
-        starting_image = select_starting_image(images_dir)
-        starting_index = -1
-        # show all images side by side in a pop up window
+        # one scan of the folder gives the photos in a fixed order (by capture time or name)
+        index = ImageIndex.build(images_dir, order)
+        print(f"{len(index)} photos, ordered by {order}")
+        # a journal left by an earlier session (crashed or quit) can be picked up where it stopped
+        journal = SessionJournal(images_dir)
+        get_root()
+        resume = journal.load() and messagebox.askyesno(
+            "Resume session", f"Resume the last session after {journal.records[-1]['file']}?\n"
+                              f"({sum(record['event'] == 'entered' for record in journal.records)} photos entered)")
         global default_location, default_comment, default_photographer, default_address
         default_address = ""
         default_location = ""
         default_comment = "General Condition"
         default_photographer = ""
-        image_index = 1
-        for filename in os.listdir(images_dir):
-
-            if (starting_image and filename == starting_image):
-                starting_image = None  # Reset starting_image to process the remaining images
-                starting_index = image_index
-
+        if resume:
+            if journal.header.get("order", order) != order:
+                order = journal.header["order"]  # keep the numbering of the journaled session
+                index = ImageIndex.build(images_dir, order)
+            start = journal.resume_position(index)
+            last = journal.last_entered()
+            image_index = last["image_index"] + 1 if last else 1
+            starting_index = -1 if last else image_index  # the first photo still fills in empty defaults
+            defaults = journal.records[-1]["defaults"]
+            default_location, default_comment = defaults["location"], defaults["comment"]
+            default_photographer, default_address = defaults["photographer"], defaults["address"]
+            print(f"Resuming at photo {start + 1} of {len(index)}")
+        else:
+            # prompt for the starting image
+            starting_image = select_starting_image(images_dir, index)
+            starting_index = -1
+            start = 0
             if starting_image:
-                image_index += 1
-                continue  # while starting image is not 'None' Skip images until the starting image is found
-
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
+                start = index.position(starting_image)
+                if start is None:
+                    print(f"{starting_image} is not in {images_dir}, exiting...")
+                    return
+                starting_index = start + 1
+            image_index = start + 1
+        journal.start(order, resume)
+        # Save only queues the print; rendering happens in worker processes while the next photo is entered
+        global render_queue
+        render_queue = RenderQueue(images_dir, prints_dir, journal, profile, workers, memory_budget)
+        unrendered = journal.unrendered() if resume else []
+        if unrendered:
+            print(f"Rendering {len(unrendered)} photo(s) entered in the last session in the background...")
+        for record in unrendered:
+            render_queue.submit(record)
+        interaction_times = {}  # filename -> stage times spent in this process, merged with the render's
+        filenames = index.names[start:]
+        # decode the next few previews on a worker thread while the current photo is being filled in
+        prefetcher = PreviewPrefetcher(images_dir, filenames, round(get_root().winfo_screenwidth()/2))
+        report = RunReport("manual")
+        completed = False  # every photo was gone through, rather than the session being quit
+        try:
+            for filename in filenames:
                 print(f"\nANNOTATING {filename}:")
 
                 image_path = os.path.join(images_dir, filename)
-                location, comment, photographer, address, default_location, default_comment, default_photographer, default_address = show_image_and_get_input(image_path, default_location, default_comment, default_photographer, default_address)
+                take_stage_times()
+                with timed("open"):
+                    # only the EXIF header: the preview comes from the prefetcher and the print from a worker
+                    try:
+                        captured = read_exif_fields(image_path).date
+                    except OSError:
+                        captured = None
+                with timed("prefetch_wait"):
+                    preview = prefetcher.get(filename)
+                location, comment, photographer, address, default_location, default_comment, default_photographer, default_address = show_image_and_get_input(image_path, default_location, default_comment, default_photographer, default_address, preview)
 
                 if location == "DELETE" and comment == "DELETE":
                     print(f"Deleting {filename} and moving to the next image.")
                     os.remove(image_path)
+                    journal.deleted(filename, {"location": default_location, "comment": default_comment,
+                                               "photographer": default_photographer, "address": default_address})
+                    report.add_file(filename, take_stage_times(), {"deleted": 1})
                     continue
 
 
@@ -435,84 +2123,244 @@ def main():
                     if default_address.strip() == "":
                         default_address = address
 
-                output_name = address.strip()+"_"+str(image_index)+".jpg"
+                output_name = address.strip()+"_"+str(image_index)+output_extension(profile, ".jpg")
                 output_name = output_name.replace(" ", "_")
                 output_path = os.path.join(prints_dir, output_name)
-                
-                # set date to now
-                date = ""
-                # try/catch set date of image from metadata
-
-                try:
-                    date = Image.open(image_path)._getexif()[36867]
-                except:
-                    date = time.strftime("%H:%M:%S", time.localtime())
+            
+                # date of image from metadata, else set date to now
+                date = captured or time.strftime("%H:%M:%S", time.localtime())
                 left_text = f"{output_name}\n{location}\n{comment}"
                 right_text = f"{photographer}\nMunicon West Coast\n{date}"
-                annotate_image(image_path, left_text, right_text, output_path)
-                print(f"Annotated image saved: {output_path}")
+                record = journal.entered(filename, image_index, output_name, left_text, right_text,
+                                         {"location": default_location, "comment": default_comment,
+                                          "photographer": default_photographer, "address": default_address})
+                render_queue.submit(record)
+                print(f"Queued {output_path}")
+                interaction_times[filename] = take_stage_times()
                 image_index += 1
-
-
-
+            completed = True
+        finally:
+            # also runs when the window's quit button exits the program
+            prefetcher.close()
+            close_annotation_window()
+            for filename, output_path, error, stage_times, counters in render_queue.wait():
+                counters = dict(counters, **({"failed": 1} if error else {"annotated": 1}))
+                report.add_file(filename, dict(interaction_times.pop(filename, {}), **stage_times), counters)
+            for filename, error in render_queue.failures:
+                print(f"  FAILED {filename}: {error}")
+            if completed and not render_queue.failures:
+                journal.finish()
+            elif completed:
+                print("Some prints failed; the next session on this folder offers to render them again.")
+            render_queue = None
+            journal.close()
+            report.write(prints_dir)
         return
     else:
-        df = pd.read_csv(csv_path)
-
-        for index, row in df.iterrows():
-            filename = row.get('SourceFile') or row.get('FileName', '')  # Use 'SourceFile' if it exists, else use 'FileName'
-            image_path = os.path.join(images_dir, filename)
-            default_date = Image.open(image_path)._getexif()[36867]
-            output_path = os.path.join(prints_dir, filename)  # Adjust output path as required
-            # if the column 'SourceFile' exists, then use the old form of CSV file
-
-            left_text = ""
-            right_text = ""
-
-             # Check for SourceFile or FileName for left_text
-            if not pd.isna(row.get('SourceFile', pd.NA)):
-                left_text += str(row['SourceFile']) + "\n"
-            elif not pd.isna(row.get('FileName', pd.NA)):
-                left_text += str(row['FileName']) + "\n"
-
-
-            # Additional fields appending to left_text or right_text
-
-            # Do location next:
-            if not pd.isna(row.get('Location', pd.NA)):
-                left_text += str(row['Location']) + "\n"
-            elif not pd.isna(row.get('ImageDescription', pd.NA)):
-                right_text += str(row['ImageDescription']) + "\n"
-
-            if not pd.isna(row.get('UserComment', pd.NA)):
-                left_text += str(row['UserComment'])
-            elif not pd.isna(row.get('Comment', pd.NA)):
-                left_text += str(row['Comment'])
-
-            if not default_date or pd.isna(default_date):
-                if not pd.isna(row.get('DateTimeOriginal', pd.NA)):
-                    right_text += str(row['DateTimeOriginal']) + "\n"
-                elif not pd.isna(row.get('Date', pd.NA)):
-                    right_text += str(row['Date']) + "\n"
-                else:
-                    right_text += "NO TIMESTAMP FOUND\n"
-            else:
-                # get date from the photo metadata as opposed to the csv file
-                right_text += default_date + "\n"
-
-            # artist
-            if not pd.isna(row.get('Photographer', pd.NA)):
-                right_text += str(row['Photographer']) + "\n"
-            elif not pd.isna(row.get('Artist', pd.NA)):
-                right_text += str(row['Artist']) + "\n"
-
-            right_text += "Municon West Coast"
-
-            if os.path.exists(image_path):
-                annotate_image(image_path, left_text, right_text, output_path)
-                print(f"Annotated image saved: {output_path}")
-            else:
-                print(f"Image not found: {image_path}")
+        report = RunReport("csv")
+        if prescan:
+            with timed("prescan"):
+                prescan_timestamps(images_dir, iter_csv_records(csv_path))
+            report.add_file("(prescan)", take_stage_times())
+        annotate_batch(images_dir, prints_dir, iter_csv_records(csv_path), workers=workers, overwrite=overwrite,
+                       total=count_csv_rows(csv_path), profile=profile, report=report, memory_budget=memory_budget)
+        report.write(prints_dir)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Annotate site photos with address, location, comment, photographer and date.",
+        epilog="Run without arguments to pick folders and annotate photos interactively.")
+    parser.add_argument("--images", help="image directory; giving this runs headless, without any windows")
+    parser.add_argument("--csv", help="photo data CSV [FileName, Date, Photographer, Location, Comment] (required when headless)")
+    parser.add_argument("--output", help="output directory for annotated prints (default: <images>/../Prints)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help=f"number of worker processes (default: {BATCH_WORKERS})")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="memory budget per worker process in MB: photos wait while the estimated size of those "
+                             "being rendered exceeds MB x workers, and a photo larger than MB renders alone")
+    parser.add_argument("--overwrite", choices=OVERWRITE_POLICIES, default="always",
+                        help="always: re-annotate every photo (default); skip: keep prints that already exist; "
+                             "changed: only re-annotate photos whose image or CSV text changed since the last run "
+                             "(CSV runs only; manual mode always saves the photo just entered)")
+    parser.add_argument("--profile", choices=OUTPUT_PROFILES, default=DEFAULT_OUTPUT_PROFILE,
+                        help="output profile: original keeps the source size and format (default); "
+                             "print is a 2400 px optimized JPEG; webp is a 2400 px WebP")
+    parser.add_argument("--max-dimension", type=int, help="override the profile's maximum long edge in pixels (0 for none)")
+    parser.add_argument("--quality", type=int, help="override the profile's JPEG/WebP quality (1-100)")
+    parser.add_argument("--format", choices=("jpeg", "webp"), help="override the profile's output format")
+    parser.add_argument("--progressive", action=argparse.BooleanOptionalAction, help="override whether JPEG prints are progressive")
+    parser.add_argument("--lossless", action="store_true",
+                        help="for JPEG photos printed at full size, re-encode only the rows under the text and copy "
+                             "the rest bit for bit (needs jpegtran from libjpeg-turbo 2.1+); other photos are re-encoded as usual")
+    parser.add_argument("--order", choices=IMAGE_ORDERS, default=DEFAULT_IMAGE_ORDER,
+                        help="order of photos in manual mode: by EXIF capture time (default) or file name")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and annotate photos as they land in the image directory or change in the CSV")
+    parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL,
+                        help=f"seconds between folder checks in --watch mode (default: {WATCH_POLL_INTERVAL:g})")
+    parser.add_argument("--settle", type=float, default=WATCH_SETTLE_TIME,
+                        help=f"seconds a new photo (or the edited CSV) must stay unchanged before it is read "
+                             f"(default: {WATCH_SETTLE_TIME:g})")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="profile the run with cProfile and save the stats to FILE (covers the main process "
+                             "only: use --workers 1 to include rendering)")
+    parser.add_argument("--prescan", action="store_true",
+                        help="read every photo's EXIF header first and warn about photos without a timestamp")
+    return parser
+
+def output_profile(args):
+    """The output profile selected on the command line, with any overrides applied."""
+    profile = dict(OUTPUT_PROFILES[args.profile])
+    if args.max_dimension is not None:
+        profile["max_dimension"] = args.max_dimension or None
+    if args.quality is not None:
+        profile["quality"] = args.quality
+    if args.format:
+        profile["format"] = args.format.upper()
+    if args.progressive is not None:
+        profile["progressive"] = args.progressive
+    if args.lossless:
+        profile["lossless"] = True
+    return profile
+
+def memory_budget(args):
+    """The per-worker memory budget from the command line, in bytes, or None."""
+    return args.memory_budget * 1024 * 1024 if args.memory_budget else None
+
+def run_headless(args):
+    """Annotate every photo listed in the CSV without importing tkinter. Returns the process exit code."""
+    if not os.path.isdir(args.images):
+        print(f"Image directory not found: {args.images}")
+        return 2
+    if not os.path.isfile(args.csv):
+        print(f"CSV file not found: {args.csv}")
+        return 2
+
+    prints_dir = args.output or os.path.join(args.images, "../Prints")
+    os.makedirs(prints_dir, exist_ok=True)
+
+    report = RunReport("headless")
+    if args.prescan:
+        with timed("prescan"):
+            prescan_timestamps(args.images, iter_csv_records(args.csv))
+        report.add_file("(prescan)", take_stage_times())
+
+    failures = annotate_batch(args.images, prints_dir, iter_csv_records(args.csv), workers=args.workers,
+                              overwrite=args.overwrite, total=count_csv_rows(args.csv), profile=output_profile(args),
+                              report=report, memory_budget=memory_budget(args))
+    report.write(prints_dir)
+    return 1 if failures else 0
+
+def run_watch(args):
+    """Annotate photos as they land in the image directory (and rows as they change in the CSV), until Ctrl+C."""
+    if not os.path.isdir(args.images):
+        print(f"Image directory not found: {args.images}")
+        return 2
+    prints_dir = args.output or os.path.join(args.images, "../Prints")
+    os.makedirs(prints_dir, exist_ok=True)
+    profile = output_profile(args)
+    report = RunReport("watch")
+    watcher = FolderWatcher(args.images, settle_time=args.settle)
+    watcher.prime()
+    executor = WorkerPool(args.workers) if args.workers > 1 else None
+    manifest = RenderManifest(prints_dir)  # loaded once; each render only appends to its log
+
+    def load_records():
+        if not os.path.isfile(args.csv):
+            return {}
+        return {record.filename: record for record in iter_csv_records(args.csv)}
+
+    def csv_signature():
+        return source_signature(args.csv)
+
+    def render(names):
+        records = [records_by_name[name] for name in sorted(names)]
+        annotate_batch(args.images, prints_dir, records, workers=args.workers, overwrite="changed",
+                       profile=profile, report=report, executor=executor, memory_budget=memory_budget(args),
+                       manifest=manifest)
+
+    records_by_name = {}
+    last_csv_signature = None  # of the CSV contents in records_by_name; the first load catches up on the folder
+    # a changed CSV must keep its size and mtime for --settle seconds, like a photo, before it is read again;
+    # (signature, monotonic time first seen), with the CSV found at startup read at once
+    csv_settling = (csv_signature(), time.monotonic() - args.settle)
+    due = set()  # photos handed out by the watcher, or with new CSV rows, not rendered yet
+    waiting_for_csv = set()  # photos that landed before their CSV row
+    print(f"\nWatching {args.images} and {args.csv} (Ctrl+C to stop)...")
+    try:
+        while True:
+            try:
+                due.update(watcher.poll())
+
+                signature = csv_signature()
+                if signature != csv_settling[0]:
+                    csv_settling = (signature, time.monotonic())
+                if signature != last_csv_signature and time.monotonic() - csv_settling[1] >= args.settle:
+                    loaded = load_records()
+                    # rows that are new or edited, for photos that are already here (all of them on the first load)
+                    due.update(name for name, record in loaded.items()
+                               if records_by_name.get(name) != record and name in watcher.known)
+                    due.update(waiting_for_csv)
+                    waiting_for_csv.clear()
+                    records_by_name, last_csv_signature = loaded, signature
+
+                missing = {name for name in due if name not in records_by_name}
+                if missing:
+                    print(f"Waiting for CSV rows for: {', '.join(sorted(missing))}")
+                waiting_for_csv |= missing
+                due -= missing
+                if due:
+                    render(due)
+                    due.clear()
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                # e.g. a CSV locked by Excel or a network share dropping out: keep the last good rows and retry
+                print(f"Watch pass failed, retrying: {type(e).__name__}: {e}")
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        manifest.save()
+        report.write(prints_dir)
+    return 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.memory_budget is not None and args.memory_budget < 1:
+        parser.error("--memory-budget must be at least 1 MB")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        parser.error("--quality must be between 1 and 100")
+
+    if args.images and not args.csv:
+        parser.error("--csv is required when running headless with --images")
+    if args.watch and not args.images:
+        parser.error("--watch needs --images and --csv")
+    if args.lossless and not find_jpegtran():
+        print("jpegtran with -drop (libjpeg-turbo 2.1+) was not found on the PATH, "
+              "--lossless prints will be re-encoded as usual")
+
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if not args.images:
+            import_tkinter()
+            run_interactive(args.workers, output_profile(args), args.order, memory_budget(args),
+                            overwrite=args.overwrite, prescan=args.prescan)
+            return 0
+        if args.watch:
+            return run_watch(args)
+        return run_headless(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"cProfile stats written to {args.cprofile}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import photo_annotator as pa
+from PIL import ImageFont
+
+
+@pytest.fixture
+def annotation_font(monkeypatch):
+    """Let load_font() work where the annotation font (Arial Bold) is not installed."""
+    try:
+        ImageFont.truetype(pa.FONT_FILE, size=10)
+    except OSError:
+        truetype = ImageFont.truetype
+
+        def stand_in(font=None, size=10, *args, **kwargs):
+            # Pillow's built-in font in place of the missing file, still loaded through load_font()'s cache
+            if font == pa.FONT_FILE:
+                return ImageFont.load_default(size)
+            return truetype(font, size, *args, **kwargs)
+
+        monkeypatch.setattr(ImageFont, "truetype", stand_in)
+    pa.clear_caches()
+    yield
+    pa.clear_caches()
@@ -0,0 +1,32 @@
+import photo_annotator as pa
+
+
+def write_csv(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_csv_na_markers_are_missing(tmp_path):
+    path = write_csv(tmp_path / "data.csv", "FileName,Location,Comment,Date,Artist\n"
+                                            "a.jpg,#N/A,,NaN,null\n"
+                                            "b.jpg,Kitchen,Cracked tile,2024:05:01,Jane\n")
+    records = list(pa.iter_csv_records(path))
+    assert records[0] == pa.CsvRecord("a.jpg", None, None, None, None, None)
+    assert records[1] == pa.CsvRecord("b.jpg", "Kitchen", None, "Cracked tile", "2024:05:01", "Jane")
+
+
+def test_csv_column_fallbacks(tmp_path):
+    # SourceFile wins over FileName, but an empty SourceFile falls back to it
+    path = write_csv(tmp_path / "data.csv", "﻿SourceFile,FileName,UserComment,Comment,Photographer,Artist\n"
+                                            "src.jpg,name.jpg,,Fallback,,Jane\n"
+                                            ",name2.jpg,Primary,Fallback,Kim,Jane\n")
+    first, second = pa.iter_csv_records(path)
+    assert (first.filename, first.comment, first.photographer) == ("src.jpg", "Fallback", "Jane")
+    assert (second.filename, second.comment, second.photographer) == ("name2.jpg", "Primary", "Kim")
+
+
+def test_csv_short_and_blank_rows(tmp_path):
+    path = write_csv(tmp_path / "data.csv", "FileName,Location,Comment\n\na.jpg\n,Roof,\n")
+    records = list(pa.iter_csv_records(path))
+    assert records == [pa.CsvRecord("a.jpg", None, None, None, None, None), pa.CsvRecord("", "Roof", None, None, None, None)]
+    assert pa.count_csv_rows(path) == 2
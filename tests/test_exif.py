@@ -0,0 +1,142 @@
+import struct
+
+import pytest
+from PIL import Image
+
+import photo_annotator as pa
+
+DATE = "2024:05:01 10:00:00"
+
+
+def ascii_entry(tag, text):
+    value = text.encode("latin-1") + b"\x00"
+    return (tag, 2, len(value), value)
+
+
+def build_tiff(order, ifd0, exif=None):
+    """A TIFF block with IFD0 (and an EXIF IFD) of (tag, type, count, value bytes) entries.
+
+    Values of 4 bytes or less are stored inline in the entry, longer ones after the IFDs.
+    """
+    ifd0 = list(ifd0) + ([(pa.EXIF_IFD, 4, 1, None)] if exif is not None else [])
+    exif_offset = 8 + 2 + 12*len(ifd0) + 4
+    data_offset = exif_offset + (2 + 12*len(exif) + 4 if exif is not None else 0)
+    data = b""
+
+    def pack_ifd(entries):
+        nonlocal data
+        packed = struct.pack(order + "H", len(entries))
+        for tag, kind, count, value in entries:
+            if value is None:  # pointer to the EXIF IFD
+                value = struct.pack(order + "I", exif_offset)
+            if len(value) <= 4:
+                field = value.ljust(4, b"\x00")
+            else:
+                field = struct.pack(order + "I", data_offset + len(data))
+                data += value
+            packed += struct.pack(order + "HHI", tag, kind, count) + field
+        return packed + b"\x00\x00\x00\x00"
+
+    body = pack_ifd(ifd0) + (pack_ifd(exif) if exif is not None else b"")
+    return (b"II" if order == "<" else b"MM") + struct.pack(order + "HI", 42, 8) + body + data
+
+
+def segment(marker, payload):
+    return b"\xff" + bytes([marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def write_jpeg(path, *segments):
+    """A JPEG header with the given segments, then a start of scan (the reader stops there)."""
+    path.write_bytes(b"\xff\xd8" + b"".join(segments) + b"\xff\xda\x00\x02" + b"\x00" * 16 + b"\xff\xd9")
+    return str(path)
+
+
+def full_tiff(order, artist="Jane Smith"):
+    return build_tiff(order, [(pa.EXIF_ORIENTATION, 3, 1, struct.pack(order + "H", 6)), ascii_entry(pa.EXIF_ARTIST, artist)],
+                      [ascii_entry(pa.EXIF_DATETIME_ORIGINAL, DATE)])
+
+
+@pytest.mark.parametrize("order", ["<", ">"])
+def test_reads_both_byte_orders(tmp_path, order):
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE1, b"Exif\x00\x00" + full_tiff(order)))
+    assert pa.read_exif_fields(path) == pa.ExifFields(DATE, 6, "Jane Smith")
+
+
+@pytest.mark.parametrize("order", ["<", ">"])
+def test_short_ascii_values_are_stored_inline(tmp_path, order):
+    # "Bob" plus its NUL fits in the 4 byte value field, "Jane Smith" is stored at an offset
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE1, b"Exif\x00\x00" + full_tiff(order, artist="Bob")))
+    assert pa.read_exif_fields(path).artist == "Bob"
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE1, b"Exif\x00\x00" + full_tiff(order, artist="Jane Smith")))
+    assert pa.read_exif_fields(path).artist == "Jane Smith"
+
+
+def test_skips_xmp_app1_before_exif(tmp_path):
+    xmp = segment(0xE1, b"http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>")
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE0, b"JFIF\x00\x01\x01" + b"\x00" * 7), xmp,
+                      segment(0xE1, b"Exif\x00\x00" + full_tiff("<")))
+    assert pa.read_exif_fields(path) == pa.ExifFields(DATE, 6, "Jane Smith")
+
+
+def test_skips_fill_bytes_before_markers(tmp_path):
+    path = write_jpeg(tmp_path / "photo.jpg", b"\xff\xff" + segment(0xE0, b"JFIF\x00"),
+                      b"\xff\xff\xff" + segment(0xE1, b"Exif\x00\x00" + full_tiff(">")))
+    assert pa.read_exif_fields(path) == pa.ExifFields(DATE, 6, "Jane Smith")
+
+
+def test_missing_tags_are_none(tmp_path):
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE1, b"Exif\x00\x00" + build_tiff("<", [ascii_entry(pa.EXIF_ARTIST, "Al")])))
+    assert pa.read_exif_fields(path) == pa.ExifFields(None, None, "Al")
+
+
+def test_jpeg_without_exif(tmp_path):
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE0, b"JFIF\x00\x01\x01" + b"\x00" * 7))
+    assert pa.read_exif_fields(path) == pa.NO_EXIF
+
+
+def test_truncated_exif_segment(tmp_path):
+    exif = segment(0xE1, b"Exif\x00\x00" + full_tiff("<"))
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"\xff\xd8" + exif[:40])  # the file ends inside the IFD
+    assert pa.read_exif_fields(str(path)) == pa.NO_EXIF
+
+
+def test_truncated_file_before_exif(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"\xff\xd8\xff")
+    assert pa.read_exif_fields(str(path)) == pa.NO_EXIF
+
+
+def test_corrupt_byte_order(tmp_path):
+    path = write_jpeg(tmp_path / "photo.jpg", segment(0xE1, b"Exif\x00\x00XX" + full_tiff("<")[2:]))
+    assert pa.read_exif_fields(path) == pa.NO_EXIF
+
+
+def test_matches_pillow_for_a_real_jpeg(tmp_path):
+    exif = Image.Exif()
+    exif[pa.EXIF_ORIENTATION] = 8
+    exif[pa.EXIF_ARTIST] = "Jane Smith"
+    exif.get_ifd(pa.EXIF_IFD)[pa.EXIF_DATETIME_ORIGINAL] = DATE
+    path = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (32, 24)).save(path, exif=exif.tobytes())
+    with pa.PhotoRecord(path) as photo:
+        assert pa.read_exif_fields(path) == pa.ExifFields(photo.date, photo.orientation, photo.artist) == (DATE, 8, "Jane Smith")
+
+
+def test_non_jpeg_falls_back_to_pillow(tmp_path):
+    exif = Image.Exif()
+    exif[pa.EXIF_ARTIST] = "Jane Smith"
+    exif.get_ifd(pa.EXIF_IFD)[pa.EXIF_DATETIME_ORIGINAL] = DATE
+    with_exif = str(tmp_path / "with.png")
+    Image.new("RGB", (8, 8)).save(with_exif, exif=exif.tobytes())
+    without_exif = str(tmp_path / "without.png")
+    Image.new("RGB", (8, 8)).save(without_exif)
+    assert pa.read_exif_fields(with_exif) == pa.ExifFields(DATE, None, "Jane Smith")
+    assert pa.read_exif_fields(without_exif) == pa.NO_EXIF
+
+
+def test_unreadable_file_raises(tmp_path):
+    path = tmp_path / "notes.jpg"
+    path.write_bytes(b"not an image")
+    with pytest.raises(OSError):
+        pa.read_exif_fields(str(path))
@@ -0,0 +1,42 @@
+import photo_annotator as pa
+
+DEFAULTS = {"location": "Roof", "comment": "Ok", "photographer": "Jane", "address": "1 Main St"}
+
+
+def journal_session(images_dir, *events):
+    journal = pa.SessionJournal(str(images_dir))
+    journal.start("capture")
+    for event, filename in events:
+        if event == "entered":
+            journal.entered(filename, 1, filename, "left", "right", DEFAULTS)
+        elif event == "rendered":
+            journal.mark_rendered(filename)
+        elif event == "finished":
+            journal.finish()
+    journal.close()
+
+
+def test_interrupted_session_is_resumable(tmp_path):
+    journal_session(tmp_path, ("entered", "a.jpg"), ("rendered", "a.jpg"), ("entered", "b.jpg"))
+    journal = pa.SessionJournal(str(tmp_path))
+    assert journal.load()
+    assert journal.last_entered()["file"] == "b.jpg"
+    assert [record["file"] for record in journal.unrendered()] == ["b.jpg"]
+
+
+def test_finished_session_is_not_offered_again(tmp_path):
+    journal_session(tmp_path, ("entered", "a.jpg"), ("rendered", "a.jpg"), ("finished", None))
+    assert not pa.SessionJournal(str(tmp_path)).load()
+
+
+def test_torn_line_is_ignored(tmp_path):
+    journal_session(tmp_path, ("entered", "a.jpg"))
+    with open(tmp_path / pa.SESSION_FILE, "a") as file:
+        file.write('{"event": "rendered", "fi')
+    journal = pa.SessionJournal(str(tmp_path))
+    assert journal.load() and journal.rendered == set()
+    journal.start("capture", resume=True)
+    journal.mark_rendered("a.jpg")
+    journal.close()
+    journal = pa.SessionJournal(str(tmp_path))
+    assert journal.load() and journal.rendered == {"a.jpg"}
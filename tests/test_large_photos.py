@@ -0,0 +1,29 @@
+import io
+import struct
+
+from PIL import Image
+
+import photo_annotator as pa
+
+
+def huge_jpeg(path, width, height):
+    """A tiny JPEG whose header claims width x height pixels, as a drone mosaic's would."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 12), "gray").save(buffer, format="JPEG")
+    data = bytearray(buffer.getvalue())
+    sof = data.index(b"\xff\xc0")  # baseline start of frame: length, precision, height, width
+    data[sof + 5:sof + 9] = struct.pack(">HH", height, width)
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def test_photos_over_pillows_bomb_limit_open(tmp_path):
+    path = huge_jpeg(tmp_path / "mosaic.jpg", 16000, 12000)  # 192 MP, over Pillow's default limit of ~179 MP
+    with pa.PhotoRecord(path) as photo:
+        assert photo.size == (16000, 12000)
+    assert pa.estimate_render_memory(path) >= 16000 * 12000 * 3
+    assert pa.load_preview(path, 800).size == (800, 600)
+
+
+def test_placeholder_preview():
+    assert pa.placeholder_preview(800, "No preview: OSError").size == (800, 600)
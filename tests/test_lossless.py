@@ -0,0 +1,127 @@
+import os
+import random
+
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+import photo_annotator as pa
+
+LEFT_TEXT = "1_Main_St_1.jpg\nKitchen\nCracked tile"
+RIGHT_TEXT = "Jane\nMunicon West Coast\n2024:05:01"
+
+
+@pytest.fixture
+def no_cached_jpegtran(monkeypatch):
+    monkeypatch.setattr(pa, "_jpegtran", None)
+
+
+def fake_jpegtran(tmp_path, usage):
+    """A jpegtran that prints `usage` and fails at everything, logging its arguments to calls.log. Returns its directory."""
+    path = tmp_path / "jpegtran"
+    path.write_text(f"#!/bin/sh\necho \"$@\" >> '{tmp_path / 'calls.log'}'\necho '{usage}' >&2\nexit 1\n")
+    path.chmod(0o755)
+    return str(tmp_path)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_jpegtran_without_drop_is_not_used(tmp_path, monkeypatch, no_cached_jpegtran):
+    monkeypatch.setenv("PATH", fake_jpegtran(tmp_path, "  -crop WxH+X+Y    Crop to a rectangular region"))
+    assert pa.find_jpegtran() is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_jpegtran_with_drop_is_used(tmp_path, monkeypatch, no_cached_jpegtran):
+    monkeypatch.setenv("PATH", fake_jpegtran(tmp_path, "  -drop +X+Y filename    Drop (insert) another image"))
+    assert pa.find_jpegtran() == str(tmp_path / "jpegtran")
+
+
+@pytest.fixture
+def jpegtran(no_cached_jpegtran):
+    if not pa.find_jpegtran():
+        pytest.skip("needs jpegtran with -drop (libjpeg-turbo 2.1+)")
+
+
+def test_lossless_print_keeps_the_photo_above_the_text(tmp_path, annotation_font, jpegtran):
+    # a textured gradient; 4:4:4 keeps chroma upsampling from mixing rows across the strip edge
+    random.seed(1)
+    gradient = Image.linear_gradient("L").resize((640, 480))
+    noise = Image.frombytes("L", (640, 480), bytes(random.randrange(256) for _ in range(640 * 480)))
+    source = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.2), gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    source_path = str(tmp_path / "photo.jpg")
+    source.save(source_path, quality=90, subsampling=0)
+    profile = dict(pa.OUTPUT_PROFILES["original"], lossless=True)
+
+    output_path = str(tmp_path / "lossless.jpg")
+    with pa.PhotoRecord(source_path) as photo:
+        assert pa.annotate_jpeg_lossless(photo, LEFT_TEXT, RIGHT_TEXT, output_path, profile)
+    reference_path = str(tmp_path / "reference.png")  # the same drawing, without a JPEG generation
+    pa.annotate_image(source_path, LEFT_TEXT, RIGHT_TEXT, reference_path, dict(profile, lossless=False))
+
+    stamps = pa.text_stamps(source.size, pa.layout_text(source.size, LEFT_TEXT, RIGHT_TEXT))
+    strip_top = min(y for x, y, mask in stamps) // 8 * 8
+    assert 0 < strip_top < 480
+
+    with Image.open(source_path) as original, Image.open(output_path) as lossless, Image.open(reference_path) as reference:
+        assert lossless.size == original.size
+        above = (0, 0, 640, strip_top)
+        assert lossless.crop(above).tobytes() == original.crop(above).tobytes()
+
+        strip = (0, strip_top, 640, 480)
+        assert ImageChops.difference(lossless.crop(strip), original.crop(strip)).getbbox() is not None
+        # the strip is annotate_image()'s drawing, up to one JPEG generation at the source's quality
+        difference = ImageStat.Stat(ImageChops.difference(lossless.crop(strip), reference.convert("RGB").crop(strip)))
+        assert max(difference.mean) < 3
+
+
+@pytest.fixture
+def failing_jpegtran(tmp_path, monkeypatch, no_cached_jpegtran):
+    """A jpegtran that passes the -drop check but fails on every photo. Returns its calls.log path."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", fake_jpegtran(bin_dir, "  -drop +X+Y filename    Drop (insert) another image"))
+    assert pa.find_jpegtran()
+    return bin_dir / "calls.log"
+
+
+def lossless_print(tmp_path, image, name, profile=None):
+    """Save `image` as the source photo `name`, annotate it with --lossless and return what annotate_jpeg_lossless() did."""
+    source_path = str(tmp_path / name)
+    image.save(source_path)
+    profile = dict(pa.OUTPUT_PROFILES["original"], lossless=True, **(profile or {}))
+    output_path = str(tmp_path / ("print" + os.path.splitext(name)[1]))
+    with pa.PhotoRecord(source_path) as photo:
+        used = pa.annotate_jpeg_lossless(photo, LEFT_TEXT, RIGHT_TEXT, output_path, profile)
+    assert not os.path.exists(output_path)
+    pa.annotate_image(source_path, LEFT_TEXT, RIGHT_TEXT, output_path, profile)
+    with Image.open(output_path) as output:
+        if not profile.get("max_dimension"):
+            assert output.size == image.size
+        assert ImageChops.difference(output.convert(image.mode), image.resize(output.size)).getbbox()  # the text is there
+    return used
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_lossless_falls_back_for_non_jpeg_sources(tmp_path, annotation_font, failing_jpegtran):
+    assert not lossless_print(tmp_path, Image.new("RGB", (640, 480), "gray"), "photo.png")
+    assert failing_jpegtran.read_text().split() == ["-help"]  # refused before running it on the photo
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_lossless_falls_back_when_the_print_is_resized(tmp_path, annotation_font, failing_jpegtran):
+    assert not lossless_print(tmp_path, Image.new("RGB", (640, 480), "gray"), "photo.jpg", {"max_dimension": 320})
+    with Image.open(tmp_path / "print.jpg") as output:
+        assert output.size == (320, 240)
+    assert failing_jpegtran.read_text().split() == ["-help"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_lossless_falls_back_for_cmyk_jpegs(tmp_path, annotation_font, failing_jpegtran):
+    assert not lossless_print(tmp_path, Image.new("CMYK", (640, 480), (0, 0, 0, 64)), "photo.jpg")
+    assert failing_jpegtran.read_text().split() == ["-help"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake jpegtran")
+def test_lossless_falls_back_when_jpegtran_fails(tmp_path, annotation_font, failing_jpegtran, capsys):
+    assert not lossless_print(tmp_path, Image.new("RGB", (640, 480), "gray"), "photo.jpg")
+    assert "-crop" in failing_jpegtran.read_text()
+    assert "Lossless annotation failed" in capsys.readouterr().out
@@ -0,0 +1,94 @@
+import os
+import pathlib
+import time
+
+import pytest
+from PIL import Image
+
+import photo_annotator as pa
+
+
+def write_csv(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def folder(tmp_path, annotation_font):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    for name in ("a.jpg", "b.jpg"):
+        Image.new("RGB", (320, 240), "gray").save(images_dir / name)
+    csv_path = write_csv(tmp_path / "data.csv", "FileName,Location,Comment\na.jpg,Kitchen,Ok\nb.jpg,Roof,Ok\n")
+    return str(images_dir), str(tmp_path / "Prints"), csv_path
+
+
+def run_batch(folder, overwrite, profile=None):
+    images_dir, prints_dir, csv_path = folder
+    os.makedirs(prints_dir, exist_ok=True)
+    report = pa.RunReport("test")
+    failures = pa.annotate_batch(images_dir, prints_dir, pa.iter_csv_records(csv_path), workers=1,
+                                 overwrite=overwrite, profile=profile, report=report)
+    assert failures == []
+    return report.counters["annotated"], report.counters["skipped"]
+
+
+def test_changed_only_rerenders_what_changed(folder):
+    images_dir, prints_dir, csv_path = folder
+    assert run_batch(folder, "changed") == (2, 0)
+    assert run_batch(folder, "changed") == (0, 2)
+
+    # new annotation text for one photo
+    write_csv(pathlib.Path(csv_path), "FileName,Location,Comment\na.jpg,Kitchen,Cracked\nb.jpg,Roof,Ok\n")
+    assert run_batch(folder, "changed") == (1, 1)
+
+    # the other photo is replaced
+    time.sleep(0.01)
+    Image.new("RGB", (320, 240), "white").save(os.path.join(images_dir, "b.jpg"))
+    assert run_batch(folder, "changed") == (1, 1)
+
+    # other output settings re-render everything
+    assert run_batch(folder, "changed", profile={"quality": 50}) == (2, 0)
+
+
+def test_changed_rerenders_a_deleted_print(folder):
+    images_dir, prints_dir, csv_path = folder
+    run_batch(folder, "changed")
+    os.remove(os.path.join(prints_dir, "a.jpg"))
+    assert run_batch(folder, "changed") == (1, 1)
+
+
+def test_skip_keeps_existing_prints(folder):
+    images_dir, prints_dir, csv_path = folder
+    assert run_batch(folder, "always") == (2, 0)
+    assert run_batch(folder, "skip") == (0, 2)
+    assert run_batch(folder, "always") == (2, 0)
+
+
+def test_manifest_log_is_replayed_and_folded(tmp_path):
+    manifest = pa.RenderManifest(str(tmp_path))
+    manifest.record("a.jpg", {"source": "1"})
+    manifest.save()
+    manifest.record("b.jpg", {"source": "2"})
+    manifest.record("a.jpg", {"source": "3"})
+    with open(tmp_path / pa.MANIFEST_LOG_FILE, "a") as log:
+        log.write('["c.jpg", {"sou')  # torn by a crash mid-write
+
+    reloaded = pa.RenderManifest(str(tmp_path))
+    assert reloaded.entries == {"a.jpg": {"source": "3"}, "b.jpg": {"source": "2"}}
+    reloaded.save()
+    assert not os.path.exists(tmp_path / pa.MANIFEST_LOG_FILE)
+    assert pa.RenderManifest(str(tmp_path)).entries == reloaded.entries
+
+
+def test_shared_manifest_is_only_appended_to(folder):
+    images_dir, prints_dir, csv_path = folder
+    os.makedirs(prints_dir)
+    manifest = pa.RenderManifest(prints_dir)
+    for record in pa.iter_csv_records(csv_path):
+        failures = pa.annotate_batch(images_dir, prints_dir, [record], workers=1, overwrite="changed", manifest=manifest)
+        assert failures == []
+    assert not os.path.exists(os.path.join(prints_dir, pa.MANIFEST_FILE))  # left to the caller
+    assert manifest.logged == 2
+    manifest.save()
+    assert run_batch(folder, "changed") == (0, 2)
@@ -0,0 +1,100 @@
+import pytest
+from PIL import Image, ImageDraw
+
+import photo_annotator as pa
+
+TEXTS = [
+    "1 Main Street, Vancouver BC",
+    "General Condition",
+    "Cracked tile along the north wall of the kitchen, next to the AV cabinet; Water damage visible",
+    "Supercalifragilisticexpialidocious-roof-membrane-detail and more words after it",
+    "Two\nparagraphs that each need wrapping at narrow widths, To Wa Ty LT Yo",
+    "",
+    "   leading and  doubled   spaces   ",
+]
+
+
+def baseline_wrap_text(text, font, max_width, draw):
+    """wrap_text() as it was before the layout cache: every growing prefix measured as drawn."""
+    lines = []
+    for line in text.split('\n'):
+        if draw.textlength(line, font=font) <= max_width:
+            lines.append(line)
+        else:
+            words = line.split()
+            i = 0
+            current_line = ''
+            while i < len(words):
+                test_line = current_line + ' ' + words[i] if current_line else words[i]
+                if draw.textlength(test_line, font=font) <= max_width:
+                    current_line = test_line
+                    i += 1
+                else:
+                    if current_line:
+                        lines.append(current_line)
+                    if draw.textlength(words[i], font=font) > max_width:
+                        lines.append(words[i])
+                        i += 1
+                    current_line = ''
+            if current_line:
+                lines.append(current_line)
+    return lines
+
+
+class KerningFont:
+    """A font whose widths are not additive: letters around a space kern in by a fifth of an em."""
+
+    size = 20
+
+    def getlength(self, text, *args, **kwargs):
+        width = 11.0 * len(text)
+        width -= 4.0 * sum(1 for a, b in zip(text, text[1:]) if (a == " ") != (b == " "))
+        return width
+
+
+class KerningDraw:
+    def textlength(self, text, font):
+        return font.getlength(text)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    pa.clear_caches()
+    yield
+    pa.clear_caches()
+
+
+@pytest.mark.parametrize("max_width", [60, 150, 333, 500, 10000])
+def test_wrap_matches_the_baseline(annotation_font, max_width):
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    for size in (12, 40):
+        font = pa.load_font(size)
+        for text in TEXTS:
+            assert pa.wrap_text(text, font, max_width) == baseline_wrap_text(text, font, max_width, draw)
+
+
+@pytest.mark.parametrize("max_width", range(40, 400, 7))
+def test_wrap_matches_the_baseline_when_spaces_kern(max_width):
+    font = KerningFont()
+    for text in TEXTS:
+        assert pa.wrap_text(text, font, max_width) == baseline_wrap_text(text, font, max_width, KerningDraw())
+
+
+def test_cache_counters(annotation_font):
+    font = pa.load_font(30)
+    pa.load_font(30)
+    first = pa.wrap_text(TEXTS[2], font, 300)
+    words = len(set(TEXTS[2].split()))
+    stats = pa.cache_stats()
+    assert (stats["font_misses"], stats["font_hits"]) == (1, 1)
+    assert (stats["wrap_misses"], stats["wrap_hits"]) == (1, 0)
+    assert stats["text_width_misses"] >= words + 2  # every word, the space and the whole line
+
+    assert pa.wrap_text(TEXTS[2], font, 300) == first
+    again = pa.cache_stats()
+    assert (again["wrap_misses"], again["wrap_hits"]) == (1, 1)
+    assert again["text_width_misses"] == stats["text_width_misses"]  # nothing measured again
+    assert again["wrap_entries"] == 1 and again["font_entries"] == 1
+
+    pa.wrap_text(TEXTS[2], font, 200)  # another width is another layout
+    assert pa.cache_stats()["wrap_misses"] == 2
@@ -0,0 +1,37 @@
+import os
+
+from PIL import Image
+
+import photo_annotator as pa
+
+
+def make_photos(tmp_path, names):
+    for name in names:
+        Image.new("RGB", (800, 600), "gray").save(tmp_path / name)
+    return pa.ImageIndex.build(str(tmp_path), "name")
+
+
+def test_thumbnails_are_cached_and_pruned(tmp_path):
+    index = make_photos(tmp_path, ["a.jpg", "b.jpg"])
+    thumbnails = pa.load_thumbnails(str(tmp_path), index.entries)
+    assert {name: image.size for name, image in thumbnails.items()} == {
+        "a.jpg": (pa.THUMBNAIL_SIZE, pa.THUMBNAIL_SIZE * 3 // 4), "b.jpg": (pa.THUMBNAIL_SIZE, pa.THUMBNAIL_SIZE * 3 // 4)}
+    cache_dir = tmp_path / pa.THUMBNAIL_CACHE_DIR
+    assert len(os.listdir(cache_dir)) == 2
+
+    os.remove(tmp_path / "b.jpg")
+    index = pa.ImageIndex.build(str(tmp_path), "name")
+    pa.load_thumbnails(str(tmp_path), index.entries)
+    assert os.listdir(cache_dir) == [os.path.basename(pa.thumbnail_path(str(tmp_path), index.entries[0]))]
+
+
+def test_thumbnails_without_a_writable_cache(tmp_path, monkeypatch):
+    index = make_photos(tmp_path, ["a.jpg"])
+
+    def read_only(path, *args, **kwargs):
+        raise PermissionError(13, "Read-only file system", path)
+
+    monkeypatch.setattr(os, "makedirs", read_only)
+    thumbnails = pa.load_thumbnails(str(tmp_path), index.entries)
+    assert thumbnails["a.jpg"] is not None
+    assert not os.path.exists(tmp_path / pa.THUMBNAIL_CACHE_DIR)
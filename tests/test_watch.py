@@ -0,0 +1,159 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+
+import photo_annotator as pa
+
+SETTLE = 0.2
+
+
+def wait_for(watcher, timeout=3.0):
+    """Poll until the watcher hands out photos, or the timeout passes. Returns the sorted names."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready = watcher.poll()
+        if ready:
+            return sorted(ready)
+        time.sleep(0.02)
+    return []
+
+
+def test_new_photo_is_reported_once_settled(tmp_path):
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=SETTLE)
+    watcher.prime()
+    (tmp_path / "a.jpg").write_bytes(b"x" * 100)
+    (tmp_path / "notes.txt").write_bytes(b"x")
+    assert watcher.poll() == []  # not settled yet
+    assert wait_for(watcher) == ["a.jpg"]
+    assert wait_for(watcher, timeout=SETTLE * 2) == []  # reported once
+
+
+def test_growing_photo_waits_until_stable(tmp_path):
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=SETTLE)
+    watcher.prime()
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"x" * 100)
+    for _ in range(5):
+        time.sleep(SETTLE / 2)
+        with open(path, "ab") as file:
+            file.write(b"x" * 100)
+        assert watcher.poll() == []
+    assert wait_for(watcher) == ["a.jpg"]
+
+
+def test_empty_photo_is_not_reported(tmp_path):
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=0)
+    watcher.prime()
+    (tmp_path / "a.jpg").write_bytes(b"")
+    assert wait_for(watcher, timeout=SETTLE) == []
+
+
+def test_photo_replaced_by_rename_is_reported_again(tmp_path):
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=0)
+    watcher.prime()
+    (tmp_path / "a.jpg").write_bytes(b"x" * 100)
+    assert wait_for(watcher) == ["a.jpg"]
+    (tmp_path / "upload.tmp").write_bytes(b"y" * 100)
+    os.replace(tmp_path / "upload.tmp", tmp_path / "a.jpg")
+    assert wait_for(watcher) == ["a.jpg"]
+
+
+def test_removed_photo_is_forgotten(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"x" * 100)
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=0)
+    watcher.prime()
+    assert "a.jpg" in watcher.known
+    os.remove(tmp_path / "a.jpg")
+    watcher.poll()
+    assert "a.jpg" not in watcher.known
+
+
+def test_rescan_finds_photo_overwritten_in_place(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"x" * 100)
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=0, rescan_interval=0)
+    watcher.prime()
+    with open(tmp_path / "a.jpg", "ab") as file:
+        file.write(b"more")
+    assert wait_for(watcher) == ["a.jpg"]
+
+
+def test_photo_still_uploading_at_startup_settles_first(tmp_path):
+    old = tmp_path / "old.jpg"
+    old.write_bytes(b"x" * 100)
+    os.utime(old, (time.time() - 60, time.time() - 60))
+    (tmp_path / "new.jpg").write_bytes(b"x" * 100)
+    watcher = pa.FolderWatcher(str(tmp_path), settle_time=SETTLE)
+    watcher.prime()
+    assert list(watcher.known) == ["old.jpg"]
+    assert list(watcher.settling) == ["new.jpg"]
+    with open(tmp_path / "new.jpg", "ab") as file:
+        file.write(b"x" * 100)
+    assert watcher.poll() == []
+    assert wait_for(watcher) == ["new.jpg"]
+
+
+def run_watch(tmp_path, monkeypatch, steps, settle=0):
+    """Run the --watch loop, calling each of `steps` in place of one poll-interval sleep, then stop it."""
+    steps = list(steps)
+
+    def sleep(seconds):
+        if not steps:
+            raise KeyboardInterrupt
+        steps.pop(0)()
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    args = pa.build_parser().parse_args(["--images", str(tmp_path / "images"), "--csv", str(tmp_path / "data.csv"),
+                                         "--watch", "--workers", "1", "--settle", str(settle), "--poll-interval", "0"])
+    return pa.run_watch(args)
+
+
+@pytest.fixture
+def watched(tmp_path, annotation_font):
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (320, 240), "gray").save(tmp_path / "images" / "a.jpg")
+    return tmp_path
+
+
+def test_watch_survives_a_truncated_csv(watched, monkeypatch, capsys):
+    csv_path = watched / "data.csv"
+    complete = "FileName,Location,Comment\na.jpg,Café,Ok\n".encode("utf-8")
+    cut = complete.index("é".encode("utf-8")) + 1  # in the middle of the two-byte "é"
+
+    steps = [lambda: csv_path.write_bytes(complete[:cut]), lambda: None,
+             lambda: csv_path.write_bytes(complete), lambda: None]
+    assert run_watch(watched, monkeypatch, steps) == 0
+    assert "UnicodeDecodeError" in capsys.readouterr().out
+    assert os.path.exists(watched / "Prints" / "a.jpg")
+
+
+def test_watch_waits_for_the_csv_to_settle(watched, monkeypatch):
+    csv_path = watched / "data.csv"
+    steps = [lambda: csv_path.write_text("FileName,Location,Comment\na.jpg,Roof,Ok\n")] + [lambda: None] * 3
+    assert run_watch(watched, monkeypatch, steps, settle=60) == 0
+    assert not os.path.exists(watched / "Prints" / "a.jpg")  # still settling when the watch stopped
+
+
+def test_watch_keeps_the_last_good_rows_when_the_csv_cannot_be_read(watched, monkeypatch, capsys):
+    csv_path = watched / "data.csv"
+    csv_path.write_text("FileName,Location,Comment\na.jpg,Roof,Ok\n")
+    read_csv = pa.iter_csv_records
+    locked = []
+
+    def iter_csv_records(path):
+        if locked:
+            raise PermissionError(13, "Permission denied", path)  # e.g. open in Excel
+        return read_csv(path)
+
+    def add_photo_and_row_while_locked():
+        locked.append(True)
+        Image.new("RGB", (320, 240), "gray").save(watched / "images" / "b.jpg")
+        csv_path.write_text("FileName,Location,Comment\na.jpg,Roof,Ok\nb.jpg,Roof,Ok\n")
+
+    monkeypatch.setattr(pa, "iter_csv_records", iter_csv_records)
+    steps = [add_photo_and_row_while_locked, lambda: None, locked.clear, lambda: None]
+    assert run_watch(watched, monkeypatch, steps) == 0
+    output = capsys.readouterr().out
+    assert "PermissionError" in output
+    assert os.path.exists(watched / "Prints" / "a.jpg") and os.path.exists(watched / "Prints" / "b.jpg")
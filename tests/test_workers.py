@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+import photo_annotator as pa
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="workers only see the patched renderer when forked")
+
+render_csv_record = pa.render_csv_record
+
+
+def crashing_render(images_dir, prints_dir, record, profile=None):
+    """render_csv_record(), except that the worker process dies on photos named crash*.jpg."""
+    if record.filename.startswith("crash"):
+        os._exit(1)
+    return render_csv_record(images_dir, prints_dir, record, profile)
+
+
+@pytest.fixture
+def photos(tmp_path, annotation_font, monkeypatch):
+    monkeypatch.setattr(pa, "render_csv_record", crashing_render)
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    names = ["a.jpg", "b.jpg", "crash.jpg", "c.jpg", "d.jpg", "e.jpg"]
+    for name in names:
+        Image.new("RGB", (64, 48), "gray").save(images_dir / name)
+    records = [pa.CsvRecord(name, "Roof", None, "Ok", None, None) for name in names]
+    prints_dir = tmp_path / "Prints"
+    prints_dir.mkdir()
+    return str(images_dir), str(prints_dir), records
+
+
+def test_batch_survives_a_dead_worker(photos):
+    images_dir, prints_dir, records = photos
+    report = pa.RunReport("test")
+    failures = pa.annotate_batch(images_dir, prints_dir, records, workers=3, report=report)
+    assert [filename for filename, error in failures] == ["crash.jpg"]
+    assert "BrokenProcessPool" in failures[0][1]
+    assert report.counters["annotated"] == 5
+    assert sorted(os.listdir(prints_dir)) == sorted(["a.jpg", "b.jpg", "c.jpg", "d.jpg", "e.jpg", pa.MANIFEST_FILE])
+
+
+def test_shared_pool_is_replaced_after_a_dead_worker(photos):
+    images_dir, prints_dir, records = photos
+    pool = pa.WorkerPool(2)
+    try:
+        failures = pa.annotate_batch(images_dir, prints_dir, records, workers=2, executor=pool, memory_budget=1)
+        assert [filename for filename, error in failures] == ["crash.jpg"]
+        # the pool is still usable for the next batch
+        failures = pa.annotate_batch(images_dir, prints_dir, records[:2], workers=2, executor=pool)
+        assert failures == []
+    finally:
+        pool.shutdown()
+
+
+render_session_entry = pa.render_session_entry
+
+
+def crashing_session_render(images_dir, prints_dir, record, profile=None):
+    """render_session_entry(), except that the worker process dies on photos named crash*.jpg."""
+    if record["file"].startswith("crash"):
+        os._exit(1)
+    return render_session_entry(images_dir, prints_dir, record, profile)
+
+
+def session_record(queue, name):
+    return queue.journal.entered(name, 1, name, "1\nRoof\nOk", "Jane\n2024:05:01", {})
+
+
+@pytest.fixture
+def render_queue(photos, monkeypatch):
+    monkeypatch.setattr(pa, "render_session_entry", crashing_session_render)
+    images_dir, prints_dir, records = photos
+    journal = pa.SessionJournal(images_dir)
+    journal.start("name")
+    yield lambda **options: pa.RenderQueue(images_dir, prints_dir, journal, workers=2, **options)
+    journal.close()
+
+
+def wait_until_idle(queue, timeout=30):
+    deadline = time.monotonic() + timeout
+    while queue.status()[0] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return queue.status()
+
+
+def test_render_queue_survives_a_dead_worker(render_queue):
+    queue = render_queue()
+    queue.submit(session_record(queue, "crash.jpg"))
+    pending, saved, failures = wait_until_idle(queue)
+    assert pending == 0 and [filename for filename, error in failures] == ["crash.jpg"]
+    assert "FAILED" in queue.status_text()
+
+    queue.submit(session_record(queue, "a.jpg"))  # goes to a fresh pool instead of raising
+    queue.submit(session_record(queue, "b.jpg"))
+    results = queue.wait()
+    assert [(filename, error is None) for filename, output_path, error, times, counters in results] == \
+        [("crash.jpg", False), ("a.jpg", True), ("b.jpg", True)]
+    queue.journal.close()
+    journal = pa.SessionJournal(queue.images_dir)
+    journal.load()
+    assert [record["file"] for record in journal.unrendered()] == ["crash.jpg"]  # rendered again on resume
+
+
+def wait_in_thread(queue, timeout=60):
+    """queue.wait(), failing the test instead of hanging if it never returns."""
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(queue.wait()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "RenderQueue.wait() hung"
+    return [(filename, error is None) for filename, output_path, error, times, counters in results]
+
+
+def test_render_queue_budget_survives_a_dead_worker(render_queue):
+    # a 1 byte budget holds every print back until the one before it is done
+    queue = render_queue(memory_budget=1)
+    for name in ("crash.jpg", "a.jpg", "b.jpg"):
+        queue.submit(session_record(queue, name))
+    assert wait_in_thread(queue) == [("crash.jpg", False), ("a.jpg", True), ("b.jpg", True)]
+    assert queue.status()[:2] == (0, 2)
+
+
+def test_render_queue_drains_when_no_pool_takes_work(render_queue, monkeypatch):
+    queue = render_queue(memory_budget=1)
+    submit = queue.pool.submit
+    calls = []
+
+    def broken_after_first(*args):
+        # the pool takes the first print, whose worker dies, and then no work at all
+        calls.append(args)
+        if len(calls) > 1:
+            raise BrokenProcessPool("no workers")
+        return submit(*args)
+
+    monkeypatch.setattr(queue.pool, "submit", broken_after_first)
+    for name in ("crash.jpg", "a.jpg", "b.jpg"):
+        queue.submit(session_record(queue, name))
+    assert wait_in_thread(queue) == [("crash.jpg", False), ("a.jpg", False), ("b.jpg", False)]
+    pending, saved, failures = queue.status()
+    assert (pending, saved, len(failures)) == (0, 0, 3)
+    assert queue.in_flight == 0
+
+
+def set_font(font_file):
+    pa.FONT_FILE = font_file
+
+
+def font_file():
+    return pa.FONT_FILE
+
+
+def die():
+    os._exit(1)
+
+
+def test_worker_pool_initializer_survives_a_restart():
+    pool = pa.WorkerPool(1, initializer=set_font, initargs=("other.ttf",))
+    try:
+        assert pool.submit(font_file).result() == "other.ttf"
+        with pytest.raises(BrokenProcessPool):
+            pool.submit(die).result()
+        assert pool.submit(font_file).result() == "other.ttf"  # the replacement pool is set up the same way
+    finally:
+        pool.shutdown()